@@ -2,7 +2,11 @@ from gtts import gTTS
 import pygame
 import tempfile
 import os
-import time
+import queue
+import re
+import threading
+
+MUSIC_END = pygame.USEREVENT + 1
 
 def main():
     story = """The Amazing World of Lovebirds
@@ -18,29 +22,58 @@ def main():
     print("Hello from story-teller!")
     print("Generating audio...")
 
-    # Generate speech
-    tts = gTTS(story)
-    
-    # Save to temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as fp:
-        temp_file = fp.name
-        tts.save(temp_file)
-    
-    # Initialize pygame mixer
+    # Synthesize sentence by sentence so playback can start after the first one
+    sentences = [s for s in re.split(r'(?<=[.!?])\s+', story.strip()) if s.strip()]
+    files = queue.Queue()
+    threading.Thread(target=synthesize, args=(sentences, files), daemon=True).start()
+
+    # Initialize pygame (the event queue delivers the end-of-track event).
+    # The queue needs the video subsystem, which fails to start on headless
+    # or SSH hosts unless SDL is given its dummy driver.
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
     pygame.mixer.init()
-    
+    pygame.mixer.music.set_endevent(MUSIC_END)
+
     print("Playing audio...")
-    pygame.mixer.music.load(temp_file)
-    pygame.mixer.music.play()
-    
-    # Wait for playback to finish
-    while pygame.mixer.music.get_busy():
-        time.sleep(0.1)
-    
+    played = []
+    current = files.get()
+    while current is not None:
+        pygame.mixer.music.load(current)
+        pygame.mixer.music.play()
+        played.append(current)
+
+        # Synthesis of the next sentence overlaps with playback
+        next_file = files.get()
+
+        # Block until playback finishes instead of polling get_busy(),
+        # unless there is no event queue to block on
+        if pygame.display.get_init():
+            while pygame.event.wait().type != MUSIC_END:
+                pass
+        else:
+            while pygame.mixer.music.get_busy():
+                pygame.time.wait(50)
+        current = next_file
+
     # Clean up
     pygame.mixer.quit()
-    os.unlink(temp_file)
+    pygame.quit()
+    for temp_file in played:
+        os.unlink(temp_file)
     print("Done!")
 
+
+def synthesize(sentences, files):
+    """Synthesize each sentence to its own MP3 and hand it to the player."""
+    try:
+        for sentence in sentences:
+            tts = gTTS(sentence)
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as fp:
+                tts.write_to_fp(fp)
+            files.put(fp.name)
+    finally:
+        files.put(None)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -11,6 +11,8 @@ import argparse
 import logging
 from pathlib import Path
 
+_SEP = "=" * 60
+
 
 def main():
     """Main CLI function."""
@@ -66,13 +68,11 @@ def main():
     else:
         prompt = args.prompt
     
-    print(f"\n{'='*60}")
-    print(f"📸 Image Analysis")
-    print(f"{'='*60}")
-    print(f"File: {image_path.name}")
+    header = ["", _SEP, "📸 Image Analysis", _SEP, f"File: {image_path.name}"]
     if prompt:
-        print(f"Prompt: {prompt}")
-    print(f"{'='*60}\n")
+        header.append(f"Prompt: {prompt}")
+    header.append(_SEP + "\n")
+    print("\n".join(header))
     
     try:
         from services import ImageService
@@ -84,15 +84,11 @@ def main():
         else:
             result = service.analyze(image_path, prompt=prompt)
         
-        print(f"\n{'='*60}")
-        print("Analysis Result:")
-        print(f"{'='*60}")
-        print(result)
-        print(f"{'='*60}\n")
+        print("\n".join(["", _SEP, "Analysis Result:", _SEP, result, _SEP + "\n"]))
         
         if args.output:
             output_path = Path(args.output)
-            output_path.write_text(result)
+            output_path.write_text(result, newline="\n")
             print(f"💾 Saved to: {output_path}\n")
         
         return 0
@@ -13,6 +13,8 @@ import argparse
 import logging
 from pathlib import Path
 
+_SEP = "=" * 60
+
 
 def main():
     """Main CLI function."""
@@ -42,6 +44,12 @@ def main():
         help="Also save raw transcript to this file"
     )
     
+    parser.add_argument(
+        "--accurate",
+        action="store_true",
+        help="Use beam search decoding (slower, more accurate)"
+    )
+    
     parser.add_argument(
         "--verbose",
         "-v",
@@ -62,26 +70,26 @@ def main():
         print(f"❌ Error: File not found: {audio_path}")
         sys.exit(1)
     
-    print(f"\n{'='*60}")
-    print(f"📝 Meeting Processing")
-    print(f"{'='*60}")
-    print(f"File: {audio_path.name}")
-    print(f"Model: {args.model}")
-    print(f"{'='*60}\n")
+    print("\n".join([
+        "", _SEP, "📝 Meeting Processing", _SEP,
+        f"File: {audio_path.name}",
+        f"Model: {args.model}",
+        _SEP + "\n",
+    ]))
     
     try:
         print("🎤 Step 1: Transcribing audio...")
-        from services import AudioService
+        from services import get_audio_service
         
-        audio_service = AudioService(model_name=args.model)
-        transcription = audio_service.transcribe(audio_path)
+        audio_service = get_audio_service(args.model)
+        transcription = audio_service.transcribe(audio_path, accurate=args.accurate)
         
         print(f"\n✅ Transcription complete ({len(transcription.text)} characters)")
         print(f"Language: {transcription.language} ({transcription.language_probability:.2%})\n")
         
         if args.save_transcript:
             transcript_path = Path(args.save_transcript)
-            transcript_path.write_text(transcription.text)
+            transcript_path.write_text(transcription.text, newline="\n")
             print(f"💾 Transcript saved to: {transcript_path}\n")
         
         print("📝 Step 2: Generating meeting minutes...\n")
@@ -90,15 +98,11 @@ def main():
         doc_service = DocumentService()
         minutes = doc_service.generate_meeting_minutes(transcription.text)
         
-        print(f"\n{'='*60}")
-        print("Meeting Minutes:")
-        print(f"{'='*60}")
-        print(minutes)
-        print(f"{'='*60}\n")
+        print("\n".join(["", _SEP, "Meeting Minutes:", _SEP, minutes, _SEP + "\n"]))
         
         if args.output:
             output_path = Path(args.output)
-            output_path.write_text(minutes)
+            output_path.write_text(minutes, newline="\n")
             print(f"💾 Minutes saved to: {output_path}\n")
         
         return 0
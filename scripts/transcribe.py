@@ -11,6 +11,8 @@ import argparse
 import logging
 from pathlib import Path
 
+_SEP = "=" * 60
+
 
 def main():
     """Main CLI function."""
@@ -42,6 +44,12 @@ def main():
         help="Output file path (optional, will save transcript)"
     )
     
+    parser.add_argument(
+        "--accurate",
+        action="store_true",
+        help="Use beam search decoding (slower, more accurate)"
+    )
+    
     parser.add_argument(
         "--verbose",
         "-v",
@@ -62,31 +70,31 @@ def main():
         print(f"❌ Error: File not found: {audio_path}")
         sys.exit(1)
     
-    print(f"\n{'='*60}")
-    print(f"🎤 Audio Transcription")
-    print(f"{'='*60}")
-    print(f"File: {audio_path.name}")
-    print(f"Model: {args.model}")
-    print(f"Language: {args.language}")
-    print(f"{'='*60}\n")
+    print("\n".join([
+        "", _SEP, "🎤 Audio Transcription", _SEP,
+        f"File: {audio_path.name}",
+        f"Model: {args.model}",
+        f"Language: {args.language}",
+        _SEP + "\n",
+    ]))
     
     try:
-        from services import AudioService
+        from services import get_audio_service
         
-        service = AudioService(model_name=args.model)
+        service = get_audio_service(args.model)
         
         language = None if args.language == "auto" else args.language
-        result = service.transcribe(audio_path, language=language)
+        result = service.transcribe(audio_path, language=language, accurate=args.accurate)
         
-        print(f"\n{'='*60}")
-        print(f"Language: {result.language} ({result.language_probability:.2%} confidence)")
-        print(f"{'='*60}")
-        print(result.text)
-        print(f"{'='*60}\n")
+        print("\n".join([
+            "", _SEP,
+            f"Language: {result.language} ({result.language_probability:.2%} confidence)",
+            _SEP, result.text, _SEP + "\n",
+        ]))
         
         if args.output:
             output_path = Path(args.output)
-            output_path.write_text(result.text)
+            output_path.write_text(result.text, newline="\n")
             print(f"💾 Saved to: {output_path}\n")
         
         return 0
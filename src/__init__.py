@@ -4,15 +4,29 @@ AI Content Processor
 A comprehensive AI-powered application for processing audio and visual content.
 """
 
+import importlib
+
 __version__ = "1.0.0"
 __author__ = "Muhammad Omar Muneer <momarm45@gmail.com>"
 
-from services.audio_service import AudioService
-from services.image_service import ImageService
-from services.document_service import DocumentService
+# Services are imported on first access (PEP 562) so that importing the
+# package does not pull in faster_whisper, torch, anthropic, etc.
+_LAZY_IMPORTS = {
+    "AudioService": "services.audio_service",
+    "ImageService": "services.image_service",
+    "DocumentService": "services.document_service",
+}
 
 __all__ = [
     "AudioService",
     "ImageService",
     "DocumentService",
 ]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,6 +5,7 @@ This module manages all configuration from environment variables.
 """
 
 import os
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Literal
 from dotenv import load_dotenv
@@ -12,39 +13,74 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+# Filesystem layout, resolved once at import
+PROJECT_ROOT: Path = Path(__file__).parent.parent.parent.parent
+DATA_DIR: Path = PROJECT_ROOT / "data"
+AUDIO_DIR: Path = DATA_DIR / "audio"
+IMAGES_DIR: Path = DATA_DIR / "images"
+OUTPUT_DIR: Path = DATA_DIR / "output"
 
+
+def _env(name: str, default: str, cast=str):
+    """Build a default_factory that reads an environment variable."""
+    return field(default_factory=lambda: cast(os.getenv(name, default)))
+
+
+@dataclass(frozen=True, slots=True)
 class Settings:
     """Application settings loaded from environment variables."""
     
-    ANTHROPIC_API_KEY: str = os.getenv("ANTHROPIC_API_KEY", "")
-    ANTHROPIC_MODEL: str = os.getenv("ANTHROPIC_MODEL_ID", "claude-3-5-sonnet-20241022")
+    ANTHROPIC_API_KEY: str = _env("ANTHROPIC_API_KEY", "")
+    ANTHROPIC_MODEL: str = _env("ANTHROPIC_MODEL_ID", "claude-3-5-sonnet-20241022")
+    
+    TEMPERATURE: float = _env("TEMPERATURE", "0.7", float)
+    MAX_TOKENS: int = _env("MAX_TOKENS", "1024", int)
+    
+    WHISPER_MODEL: str = _env("WHISPER_MODEL", "tiny.en")
+    # Empty means auto: AudioService picks cuda when CTranslate2 sees a
+    # GPU (checked on first use, not at import) and a matching compute type
+    WHISPER_DEVICE: str = _env("WHISPER_DEVICE", "")
+    WHISPER_COMPUTE_TYPE: str = _env("WHISPER_COMPUTE_TYPE", "")
+    WHISPER_CPU_THREADS: int = _env(
+        "WHISPER_CPU_THREADS", str(max(1, (os.cpu_count() or 2) // 2)), int
+    )
+    # 1 disables batched decoding; 0 means auto (8 on CUDA, else 1)
+    WHISPER_BATCH_SIZE: int = _env("WHISPER_BATCH_SIZE", "0", int)
+    SERVER_HOST: str = _env("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT: int = _env("SERVER_PORT", "5500", int)
+    
+    PROJECT_ROOT: Path = PROJECT_ROOT
+    DATA_DIR: Path = DATA_DIR
+    AUDIO_DIR: Path = AUDIO_DIR
+    IMAGES_DIR: Path = IMAGES_DIR
+    OUTPUT_DIR: Path = OUTPUT_DIR
     
-    TEMPERATURE: float = float(os.getenv("TEMPERATURE", "0.7"))
-    MAX_TOKENS: int = int(os.getenv("MAX_TOKENS", "1024"))
+    RESPONSE_CACHE_SIZE: int = _env("RESPONSE_CACHE_SIZE", "256", int)
+    REDIS_URL: str = _env("REDIS_URL", "")
     
-    WHISPER_MODEL: str = os.getenv("WHISPER_MODEL", "tiny.en")
-    WHISPER_DEVICE: str = os.getenv("WHISPER_DEVICE", "cpu")
-    WHISPER_COMPUTE_TYPE: str = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
-    SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
-    SERVER_PORT: int = int(os.getenv("SERVER_PORT", "5500"))
+    # auto picks BF16 torch on BF16 CPUs, int8 ONNX on VNNI/AMX, else FP32 ONNX
+    EMBEDDING_BACKEND: Literal["auto", "torch-bf16", "onnx-int8", "onnx", "torch"] = _env(
+        "EMBEDDING_BACKEND", "auto"
+    )
+    # ONNX intra-op threads (0 = all cores); set 1 for gunicorn --preload
+    EMBEDDING_THREADS: int = _env("EMBEDDING_THREADS", "0", int)
     
-    PROJECT_ROOT: Path = Path(__file__).parent.parent.parent.parent
-    DATA_DIR: Path = PROJECT_ROOT / "data"
-    AUDIO_DIR: Path = DATA_DIR / "audio"
-    IMAGES_DIR: Path = DATA_DIR / "images"
-    OUTPUT_DIR: Path = DATA_DIR / "output"
+    # Webpage Q&A API (gunicorn gthread). Sessions and their ChromaDB
+    # collections live in process memory, so run_api_server() caps the
+    # server at one worker; scale with API_THREADS instead.
+    API_WORKERS: int = _env("API_WORKERS", "1", int)
+    API_THREADS: int = _env("API_THREADS", "8", int)
     
-    LOG_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = _env("LOG_LEVEL", "INFO")
     
-    @classmethod
-    def validate(cls) -> bool:
+    def validate(self) -> bool:
         """
         Validate that required settings are present.
         
         Returns:
             True if valid, raises ValueError otherwise
         """
-        if not cls.ANTHROPIC_API_KEY:
+        if not self.ANTHROPIC_API_KEY:
             raise ValueError(
                 "ANTHROPIC_API_KEY is required. "
                 "Please set it in your .env file or environment variables."
@@ -1,6 +1,6 @@
 """Core functionality for AI Content Processor."""
 
-from core.llm_client import LLMClient
+from core.llm_client import LLMClient, extract_text
 from core.prompt_templates import (
     FinancialPromptTemplate,
     MeetingPromptTemplate,
@@ -9,6 +9,7 @@ from core.prompt_templates import (
 
 __all__ = [
     "LLMClient",
+    "extract_text",
     "FinancialPromptTemplate",
     "MeetingPromptTemplate",
     "ImagePromptTemplate",
@@ -1,4 +1,186 @@
-from langchain_huggingface import HuggingFaceEmbeddings
+import functools
+import logging
+import os
+from typing import List, Optional, Tuple
 
-def setup_embedding_model(model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
-    return HuggingFaceEmbeddings(model_name=model_name)
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ONNX exports shipped in the sentence-transformers model repos: dynamically
+# quantized int8, and the FP32 graph with O3 fusions (O4 is GPU-only fp16)
+ONNX_INT8_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+ONNX_FP32_FILE = "onnx/model_O3.onnx"
+
+# Chunks per forward pass when embedding a page
+EMBEDDING_BATCH_SIZE = 64
+
+# Rust (tokenizers) WordPiece: tokenizes each batch in one native call
+_TOKENIZER_KWARGS = {"use_fast": True}
+
+# Without one of these, int8 matmuls on x86 are often slower than FP32
+_INT8_CPU_FLAGS = frozenset({"avx512_vnni", "avx_vnni", "amx_int8"})
+
+# Native BF16 dot products (Cooper Lake / Sapphire Rapids AMX, Zen 4)
+_BF16_CPU_FLAGS = frozenset({"avx512_bf16", "amx_bf16"})
+
+
+@functools.lru_cache(maxsize=1)
+def cpu_flags() -> frozenset:
+    """Return the CPU feature flags from /proc/cpuinfo (empty if unavailable)."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return frozenset(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return frozenset()
+
+
+def resolve_backend(name: str = "auto") -> Tuple[str, Optional[str]]:
+    """
+    Map an EMBEDDING_BACKEND setting to a backend and model file.
+
+    auto prefers BF16 PyTorch where the CPU has native BF16 (no
+    quantization error, half the memory traffic of FP32), then int8 ONNX
+    on VNNI/AMX CPUs, then FP32 ONNX.
+
+    Args:
+        name: "auto", "torch-bf16", "onnx-int8", "onnx" (FP32) or "torch"
+        
+    Returns:
+        Tuple of (backend, file_name) for setup_embedding_model()
+    """
+    if name == "auto":
+        flags = cpu_flags()
+        if flags & _BF16_CPU_FLAGS:
+            name = "torch-bf16"
+        elif flags & _INT8_CPU_FLAGS:
+            name = "onnx-int8"
+        else:
+            name = "onnx"
+    if name == "onnx-int8":
+        return "onnx", ONNX_INT8_FILE
+    if name == "onnx":
+        return "onnx", ONNX_FP32_FILE
+    return name, None
+
+
+def onnx_session_options(threads: int = 0):
+    """
+    ONNX Runtime session options for CPU embedding inference.
+
+    Enables all graph optimizations (LayerNorm/GELU/attention fusion).
+    The memory-pattern planner is disabled: it caches an allocation plan
+    per input shape, which with variable-length batches only grows each
+    worker's private memory.
+
+    Args:
+        threads: Intra-op threads (0 = one per core). Use 1 when workers
+            are forked after loading: ORT then runs on the calling thread
+            and starts no thread pool that would not survive the fork.
+    """
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = threads or os.cpu_count() or 1
+    options.enable_mem_pattern = False
+    return options
+
+
+class SentenceTransformerEmbeddings:
+    """
+    LangChain-style embed_documents/embed_query adapter over a
+    SentenceTransformer (any backend), plus encode() for NumPy output.
+    """
+
+    def __init__(self, model, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.model = model
+        self.batch_size = batch_size
+        if not getattr(model.tokenizer, "is_fast", False):
+            logger.warning("Embedding model is using a slow Python tokenizer")
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into an (n, dim) float32 array."""
+        # encode() sorts by length before batching (and restores the
+        # order), so each micro-batch pads to similar lengths
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.encode(
+            text, convert_to_numpy=True, show_progress_bar=False
+        ).tolist()
+
+
+def setup_embedding_model(
+    model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+    backend: str = "torch",
+    file_name: Optional[str] = None,
+    threads: int = 0
+):
+    """
+    Load an embedding model.
+
+    Args:
+        model_name: HuggingFace model id
+        backend: SentenceTransformer backend: "torch", "onnx" or
+            "openvino", or "torch-bf16" for PyTorch with bfloat16 weights
+        file_name: Model file within the repo for non-torch backends,
+            e.g. ONNX_INT8_FILE
+        threads: ONNX Runtime intra-op threads (0 = one per core)
+
+    Returns:
+        SentenceTransformerEmbeddings (falls back to torch if the
+        requested backend cannot be loaded)
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch-bf16":
+        try:
+            import torch
+
+            # encode() upcasts the bf16 output, so callers still get float32
+            model = SentenceTransformer(
+                model_name,
+                model_kwargs={"torch_dtype": torch.bfloat16},
+                tokenizer_kwargs=_TOKENIZER_KWARGS
+            )
+            logger.info(f"Loaded {model_name} with torch backend (bfloat16)")
+            return SentenceTransformerEmbeddings(model)
+        except Exception as e:
+            logger.warning(f"bfloat16 embedding model unavailable, using float32: {e}")
+    elif backend != "torch":
+        try:
+            model_kwargs = {"file_name": file_name} if file_name else {}
+            if backend == "onnx":
+                model_kwargs["session_options"] = onnx_session_options(threads)
+                model_kwargs["provider"] = "CPUExecutionProvider"
+                # Grow the arena only as needed instead of doubling
+                model_kwargs["provider_options"] = {
+                    "arena_extend_strategy": "kSameAsRequested"
+                }
+
+            model = SentenceTransformer(
+                model_name,
+                backend=backend,
+                model_kwargs=model_kwargs or None,
+                tokenizer_kwargs=_TOKENIZER_KWARGS
+            )
+            logger.info(f"Loaded {model_name} with {backend} backend ({file_name or 'default'})")
+            return SentenceTransformerEmbeddings(model)
+        except Exception as e:
+            logger.warning(f"{backend} embedding backend unavailable, using torch: {e}")
+
+    return SentenceTransformerEmbeddings(
+        SentenceTransformer(model_name, tokenizer_kwargs=_TOKENIZER_KWARGS)
+    )
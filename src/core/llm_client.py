@@ -6,13 +6,33 @@ configuration management and error handling.
 """
 
 import logging
-from typing import Optional
+from typing import Iterator, Optional
 from langchain_anthropic import ChatAnthropic
 from config import settings
 
 logger = logging.getLogger(__name__)
 
 
+def extract_text(response) -> str:
+    """
+    Get the text out of an LLM response.
+    
+    Handles LangChain messages (``content``), agent-style results
+    (``output``) and anything else via str().
+    
+    Args:
+        response: Response returned by LLMClient.invoke()
+        
+    Returns:
+        Response text
+    """
+    content = getattr(response, "content", None)
+    if content is not None:
+        return content
+    output = getattr(response, "output", None)
+    return output if output is not None else str(response)
+
+
 class LLMClient:
     """
     Client for interacting with Claude LLM.
@@ -90,16 +110,60 @@ class LLMClient:
             >>> response = client.invoke("What is AI?")
             >>> print(response.content)
         """
-        logger.debug(f"Invoking LLM with prompt length: {len(str(prompt))}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Invoking LLM with prompt length: %d", len(str(prompt)))
         
         try:
             response = self.client.invoke(prompt)
-            logger.debug(f"LLM response received")
+            logger.debug("LLM response received")
             return response
         except Exception as e:
             logger.error(f"LLM invocation failed: {e}", exc_info=True)
             raise
     
+    async def ainvoke(self, prompt: str | list) -> any:
+        """
+        Invoke the LLM asynchronously with a prompt.
+        
+        Args:
+            prompt: Text prompt or list of messages
+            
+        Returns:
+            Response from Claude
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Invoking LLM (async) with prompt length: %d", len(str(prompt)))
+        
+        try:
+            response = await self.client.ainvoke(prompt)
+            logger.debug("LLM response received")
+            return response
+        except Exception as e:
+            logger.error(f"LLM invocation failed: {e}", exc_info=True)
+            raise
+    
+    def stream(self, prompt: str | list) -> Iterator[str]:
+        """
+        Invoke the LLM and yield the response text as it is generated.
+        
+        Args:
+            prompt: Text prompt or list of messages
+            
+        Yields:
+            Text fragments, in order
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Streaming LLM with prompt length: %d", len(str(prompt)))
+        
+        try:
+            for chunk in self.client.stream(prompt):
+                text = extract_text(chunk)
+                if text:
+                    yield text
+        except Exception as e:
+            logger.error(f"LLM streaming failed: {e}", exc_info=True)
+            raise
+    
     def set_temperature(self, temperature: float) -> None:
         """Update the temperature and reset the client."""
         self.temperature = temperature
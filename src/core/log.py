@@ -0,0 +1,99 @@
+"""
+Structured, level-filtered logging.
+
+get_logger() returns a structlog logger when structlog is installed,
+configured with a filtering bound logger at settings.LOG_LEVEL, so calls
+below that level return immediately without formatting anything.
+Without structlog it returns a small adapter over the standard logging
+module with the same call shape. Either way records go out through the
+standard logging handlers, as "event key=value ..." messages, next to
+every other module's logs:
+
+    >>> log = get_logger(__name__)
+    >>> log.info("transcription_done", chars=1234)
+"""
+
+import logging
+
+from config import settings
+
+_LEVEL = getattr(logging, settings.LOG_LEVEL, logging.INFO)
+
+try:
+    import structlog
+except ImportError:
+    structlog = None
+
+
+def _render(event: str, fields: dict) -> str:
+    """Format an event and its fields as one log message."""
+    if not fields:
+        return event
+    pairs = " ".join(f"{key}={value!r}" for key, value in fields.items())
+    return f"{event} {pairs}"
+
+
+class _StdlibLogger:
+    """Key-value logging on top of a standard library logger."""
+
+    __slots__ = ("_logger",)
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(name)
+
+    def is_enabled_for(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level: int, event: str, fields: dict) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        exc_info = fields.pop("exc_info", False)
+        self._logger.log(level, "%s", _render(event, fields), exc_info=exc_info)
+
+    def debug(self, event: str, **fields) -> None:
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields) -> None:
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields) -> None:
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields) -> None:
+        self._log(logging.ERROR, event, fields)
+
+
+def _to_stdlib(logger, method_name: str, event_dict: dict) -> tuple:
+    """structlog renderer: hand the message to the stdlib logger's method."""
+    exc_info = event_dict.pop("exc_info", False)
+    event = event_dict.pop("event")
+    return ("%s", _render(event, event_dict)), {"exc_info": exc_info}
+
+
+if structlog is not None:
+    # Handlers, timestamps and level names come from the logging config,
+    # so structlog only filters, merges bound context and renders
+    structlog.configure(
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.make_filtering_bound_logger(_LEVEL),
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            _to_stdlib,
+        ],
+        cache_logger_on_first_use=True,
+    )
+
+
+def get_logger(name: str):
+    """
+    Get a structured logger.
+
+    Args:
+        name: Logger name (usually __name__)
+
+    Returns:
+        structlog bound logger, or a stdlib-backed equivalent
+    """
+    if structlog is not None:
+        return structlog.get_logger(name)
+    return _StdlibLogger(name)
@@ -5,30 +5,13 @@ This module contains reusable prompt templates for different document
 processing tasks.
 """
 
+import sys
 from typing import Optional
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
 
-
-class FinancialPromptTemplate:
-    """Prompt templates for financial document processing."""
-    
-    @staticmethod
-    def create_financial_formatting_prompt(transcript: str) -> PromptTemplate:
-        """
-        Create a prompt for formatting financial terminology in transcripts.
-        
-        This expands financial acronyms and standardizes terminology:
-        - '401k' → '401(k) retirement savings plan'
-        - 'HSA' → 'Health Savings Account (HSA)'
-        - 'ROA' → 'Return on Assets (ROA)'
-        
-        Args:
-            transcript: The raw transcript text
-            
-        Returns:
-            PromptTemplate for financial formatting
-        """
-        template = """
+# Prompt text is fixed, so it and the LangChain templates wrapping it
+# are built (and their {placeholders} parsed) once at import.
+_FINANCIAL_FORMATTING_INSTRUCTIONS = """
         You are an intelligent assistant specializing in financial products.
         Your task is to process transcripts of earnings calls, ensuring that all 
         references to financial products and common financial terms are in the correct format.
@@ -54,28 +37,13 @@ class FinancialPromptTemplate:
         1. The adjusted transcript
         2. A list of the changes you made
         
-        Transcript:
-        {transcript}
         """
-        
-        return PromptTemplate(
-            input_variables=["transcript"],
-            template=template
-        )
-
 
-class MeetingPromptTemplate:
-    """Prompt templates for meeting processing."""
-    
-    @staticmethod
-    def create_meeting_minutes_prompt() -> ChatPromptTemplate:
-        """
-        Create a prompt for generating meeting minutes from transcripts.
-        
-        Returns:
-            ChatPromptTemplate for meeting minutes
+_FINANCIAL_FORMATTING_TEMPLATE = _FINANCIAL_FORMATTING_INSTRUCTIONS + """Transcript:
+        {transcript}
         """
-        template = """
+
+_MEETING_MINUTES_TEMPLATE = """
         Generate meeting minutes and a list of tasks based on the provided context.
 
         Context:
@@ -92,16 +60,269 @@ class MeetingPromptTemplate:
         - Actionable items with assignees (if mentioned) and deadlines (if mentioned)
         - Follow-up actions needed
         """
+
+_MEETING_MINUTES_MERGE_TEMPLATE = """
+        The following are meeting minutes for consecutive parts of the same meeting.
+        Merge them into a single set of meeting minutes and a list of tasks,
+        removing duplicates and keeping the order in which topics came up.
+
+        Partial minutes:
+        {partials}
+
+        Please provide:
         
-        return ChatPromptTemplate.from_template(template)
+        ## Meeting Minutes
+        - Key points discussed
+        - Decisions made
+        - Important topics covered
+
+        ## Task List
+        - Actionable items with assignees (if mentioned) and deadlines (if mentioned)
+        - Follow-up actions needed
+        """
+
+_NUTRITION_ANALYSIS_PROMPT = """
+                You are an expert nutritionist. Your task is to analyze the food items displayed in the image and provide a detailed nutritional assessment using the following format:
+            1. **Identification**: List each identified food item clearly, one per line.
+            2. **Portion Size & Calorie Estimation**: For each identified food item, specify the portion size and provide an estimated number of calories. Use bullet points with the following structure:
+            - **[Food Item]**: [Portion Size], [Number of Calories] calories
+            Example:
+            *   **Salmon**: 6 ounces, 210 calories
+            *   **Asparagus**: 3 spears, 25 calories
+            3. **Total Calories**: Provide the total number of calories for all food items.
+            Example:
+            Total Calories: [Number of Calories]
+            4. **Nutrient Breakdown**: Include a breakdown of key nutrients such as **Protein**, **Carbohydrates**, **Fats**, **Vitamins**, and **Minerals**. Use bullet points, and for each nutrient provide details about the contribution of each food item.
+            Example:
+            *   **Protein**: Salmon (35g), Asparagus (3g), Tomatoes (1g) = [Total Protein]
+            5. **Health Evaluation**: Evaluate the healthiness of the meal in one paragraph.
+            6. **Disclaimer**: Include the following exact text as a disclaimer:
+            The nutritional information and calorie estimates provided are approximate and are based on general food data. 
+            Actual values may vary depending on factors such as portion size, specific ingredients, preparation methods, and individual variations. 
+            For precise dietary advice or medical guidance, consult a qualified nutritionist or healthcare provider.
+            Format your response exactly like the template above to ensure consistency.
+            """
+
+# Shared by ImagePromptTemplate and ImageService so every default request
+# sends the same string object (and the same bytes for prompt caching)
+_DEFAULT_IMAGE_PROMPT = sys.intern(
+    "Describe what you see in this image in detail. Extract any text present."
+)
+
+_TEXT_EXTRACTION_PROMPT = (
+    "Please extract all text from this image. "
+    "Preserve the structure and formatting as much as possible. "
+    "If there are any diagrams or visual elements, describe them briefly."
+)
+
+_FINANCIAL_FORMATTING_PROMPT = PromptTemplate(
+    input_variables=["transcript"],
+    template=_FINANCIAL_FORMATTING_TEMPLATE
+)
+
+_MEETING_MINUTES_PROMPT = ChatPromptTemplate.from_template(_MEETING_MINUTES_TEMPLATE)
+
+_MEETING_MINUTES_MERGE_PROMPT = ChatPromptTemplate.from_template(
+    _MEETING_MINUTES_MERGE_TEMPLATE
+)
+
+# Marks the end of a static prompt prefix. Anthropic caches the whole
+# prefix up to the marker once it reaches the model's minimum (1024 tokens
+# on Sonnet); shorter prefixes are processed uncached with no write charge.
+_CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def _text_block(text: str, cache: bool = False) -> dict:
+    """
+    Create a text content block, marking static text for prompt caching.
+    
+    Args:
+        text: Block text
+        cache: Whether the text ends a static prefix worth caching
+            
+    Returns:
+        Text content block
+    """
+    block = {"type": "text", "text": text}
+    if cache:
+        block["cache_control"] = _CACHE_CONTROL
+    return block
+
+
+_USER_MESSAGE = {"role": "user"}
+
+
+def _user_messages(content: list) -> list:
+    """
+    Wrap content blocks into a single-turn user message list.
+    
+    Args:
+        content: Content blocks for the message
+        
+    Returns:
+        List of messages for Claude API
+    """
+    return [{**_USER_MESSAGE, "content": content}]
+
+
+
+class FinancialPromptTemplate:
+    """Prompt templates for financial document processing."""
+    
+    @staticmethod
+    def create_financial_formatting_prompt(transcript: Optional[str] = None) -> PromptTemplate:
+        """
+        Create a prompt for formatting financial terminology in transcripts.
+        
+        This expands financial acronyms and standardizes terminology:
+        - '401k' → '401(k) retirement savings plan'
+        - 'HSA' → 'Health Savings Account (HSA)'
+        - 'ROA' → 'Return on Assets (ROA)'
+        
+        Args:
+            transcript: Optional raw transcript to pre-bind via partial();
+                omit it and pass transcript to format() to reuse the
+                cached template as-is
+            
+        Returns:
+            PromptTemplate for financial formatting
+        """
+        if transcript is not None:
+            return _FINANCIAL_FORMATTING_PROMPT.partial(transcript=transcript)
+        return _FINANCIAL_FORMATTING_PROMPT
+    
+    @staticmethod
+    def create_financial_formatting_messages(transcript: str) -> list:
+        """
+        Create chat messages for financial formatting.
+        
+        The static instructions are sent as their own leading block so
+        they form a byte-identical prefix eligible for prompt caching.
+        
+        Args:
+            transcript: The raw transcript text
+            
+        Returns:
+            List of messages for Claude API
+        """
+        return _user_messages([
+            _text_block(_FINANCIAL_FORMATTING_INSTRUCTIONS, cache=True),
+            _text_block(f"Transcript:\n{transcript}")
+        ])
+
+
+class MeetingPromptTemplate:
+    """Prompt templates for meeting processing."""
+    
+    @staticmethod
+    def create_meeting_minutes_prompt() -> ChatPromptTemplate:
+        """
+        Create a prompt for generating meeting minutes from transcripts.
+        
+        Returns:
+            ChatPromptTemplate for meeting minutes
+        """
+        return _MEETING_MINUTES_PROMPT
+    
+    @staticmethod
+    def create_meeting_minutes_merge_prompt() -> ChatPromptTemplate:
+        """
+        Create a prompt for merging partial minutes into one document.
+        
+        Used when a long transcript is summarized in windows; expects a
+        ``partials`` variable holding the per-window minutes.
+        
+        Returns:
+            ChatPromptTemplate for merging meeting minutes
+        """
+        return _MEETING_MINUTES_MERGE_PROMPT
 
 
 class ImagePromptTemplate:
     """Prompt templates for image analysis."""
     
+    DEFAULT_PROMPT = _DEFAULT_IMAGE_PROMPT
+    
+    @staticmethod
+    def create_image_block(
+        encoded_image: Optional[str | bytes] = None,
+        media_type: str = "image/png",
+        url: Optional[str] = None,
+        cache: bool = False
+    ) -> dict:
+        """
+        Create the image content block for a Claude Vision message.
+        
+        The block can be built once per image and passed to
+        build_messages() for every prompt run against that image.
+        
+        Args:
+            encoded_image: Base64 encoded image data (str or ASCII bytes)
+            media_type: MIME type of the image
+            url: Public image URL, sent instead of inline base64 data
+            cache: Mark the image for prompt caching (worth it only when
+                several prompts will be run against the same image)
+            
+        Returns:
+            Image content block
+        """
+        if url:
+            block = {"type": "image", "source": {"type": "url", "url": url}}
+        else:
+            if isinstance(encoded_image, bytes):
+                # Base64 output is pure ASCII; skip UTF-8 validation
+                encoded_image = encoded_image.decode("ascii")
+            
+            block = {
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": media_type,
+                    "data": encoded_image
+                }
+            }
+        
+        if cache:
+            block["cache_control"] = _CACHE_CONTROL
+        return block
+    
+    @staticmethod
+    def build_messages(
+        text: str,
+        image_block: dict,
+        instructions: Optional[str] = None,
+        cache: bool = False
+    ) -> list:
+        """
+        Wrap a text prompt and a prebuilt image block into Claude messages.
+        
+        Static content comes first (instructions, then the image) and the
+        per-call text last, so repeated calls share a cacheable prefix.
+        
+        Args:
+            text: Text prompt for the image (omitted when empty)
+            image_block: Block from create_image_block()
+            instructions: Optional static instructions sent ahead of the image
+            cache: Mark the image, the last static block, so instructions
+                and image are cached as one prefix
+            
+        Returns:
+            List of messages for Claude API
+        """
+        if cache:
+            image_block = {**image_block, "cache_control": _CACHE_CONTROL}
+        content = [image_block]
+        if instructions:
+            content.insert(0, _text_block(instructions))
+        # The API rejects empty text blocks
+        if text:
+            content.append(_text_block(text))
+        
+        return _user_messages(content)
+    
     @staticmethod
     def create_image_analysis_messages(
-        encoded_image: str,
+        encoded_image: str | bytes,
         prompt: Optional[str] = None,
         media_type: str = "image/png"
     ) -> list:
@@ -117,27 +338,12 @@ class ImagePromptTemplate:
             List of messages for Claude API
         """
         if not prompt:
-            prompt = "Describe what you see in this image in detail. Extract any text present."
-        
-        messages = [{
-            "role": "user",
-            "content": [
-                {
-                    "type": "text",
-                    "text": prompt
-                },
-                {
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": media_type,
-                        "data": encoded_image
-                    }
-                }
-            ]
-        }]
+            prompt = _DEFAULT_IMAGE_PROMPT
         
-        return messages
+        return ImagePromptTemplate.build_messages(
+            prompt,
+            ImagePromptTemplate.create_image_block(encoded_image, media_type)
+        )
     
     @staticmethod
     def create_text_extraction_prompt() -> str:
@@ -147,11 +353,7 @@ class ImagePromptTemplate:
         Returns:
             Text extraction prompt
         """
-        return (
-            "Please extract all text from this image. "
-            "Preserve the structure and formatting as much as possible. "
-            "If there are any diagrams or visual elements, describe them briefly."
-        )
+        return _TEXT_EXTRACTION_PROMPT
 
 
 class NutritionistPromptTemplate:
@@ -165,52 +367,23 @@ class NutritionistPromptTemplate:
         Returns:
             Nutrition analysis prompt
         """
-        return """
-                You are an expert nutritionist. Your task is to analyze the food items displayed in the image and provide a detailed nutritional assessment using the following format:
-            1. **Identification**: List each identified food item clearly, one per line.
-            2. **Portion Size & Calorie Estimation**: For each identified food item, specify the portion size and provide an estimated number of calories. Use bullet points with the following structure:
-            - **[Food Item]**: [Portion Size], [Number of Calories] calories
-            Example:
-            *   **Salmon**: 6 ounces, 210 calories
-            *   **Asparagus**: 3 spears, 25 calories
-            3. **Total Calories**: Provide the total number of calories for all food items.
-            Example:
-            Total Calories: [Number of Calories]
-            4. **Nutrient Breakdown**: Include a breakdown of key nutrients such as **Protein**, **Carbohydrates**, **Fats**, **Vitamins**, and **Minerals**. Use bullet points, and for each nutrient provide details about the contribution of each food item.
-            Example:
-            *   **Protein**: Salmon (35g), Asparagus (3g), Tomatoes (1g) = [Total Protein]
-            5. **Health Evaluation**: Evaluate the healthiness of the meal in one paragraph.
-            6. **Disclaimer**: Include the following exact text as a disclaimer:
-            The nutritional information and calorie estimates provided are approximate and are based on general food data. 
-            Actual values may vary depending on factors such as portion size, specific ingredients, preparation methods, and individual variations. 
-            For precise dietary advice or medical guidance, consult a qualified nutritionist or healthcare provider.
-            Format your response exactly like the template above to ensure consistency.
-            """
+        return _NUTRITION_ANALYSIS_PROMPT
 
     
     @staticmethod
-    def create_nutrition_summary_prompt(prompt: str, encoded_image: str, media_type: str) -> list:
+    def create_nutrition_summary_prompt(
+        prompt: str,
+        encoded_image: str | bytes,
+        media_type: str
+    ) -> list:
         """Create a prompt for summarizing nutritional information."""
         nutrition_prompt = NutritionistPromptTemplate.create_nutrition_analysis_prompt_assisstent()
-        messages = [{
-            "role": "user",
-            "content": [
-                {
-                    "type": "text",
-                    "text":  nutrition_prompt + " " + prompt
-                },
-                {
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": media_type,
-                        "data": encoded_image
-                    }
-                }
-            ]
-        }]
-
-        return messages
+        return ImagePromptTemplate.build_messages(
+            prompt,
+            ImagePromptTemplate.create_image_block(encoded_image, media_type),
+            instructions=nutrition_prompt,
+            cache=True
+        )
 
 if __name__ == "__main__":
     # Example usage
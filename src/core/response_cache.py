@@ -0,0 +1,231 @@
+"""
+Response cache for LLM calls.
+
+This module provides an exact-match cache for LLM responses so that
+identical requests (same model, settings, prompt and input) are answered
+without another round-trip to Claude. Entries live in an in-process LRU
+and, when REDIS_URL is configured, in Redis as well.
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(*parts) -> str:
+    """
+    Build a cache key from the parts that determine an LLM response.
+
+    Args:
+        *parts: Model name, temperature, prompt text, input hash, etc.
+
+    Returns:
+        Hex BLAKE2b digest of the parts
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def file_digest(path: str | Path) -> str:
+    """
+    Hash a file's contents for use in a cache key.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        Hex SHA-256 digest of the file
+    """
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class ExactMatchCache:
+    """
+    Exact-match response cache (in-memory LRU with optional Redis).
+
+    Example:
+        >>> cache = ExactMatchCache(maxsize=128)
+        >>> cache.set(make_key("model", "prompt"), "answer")
+        >>> cache.get(make_key("model", "prompt"))
+        'answer'
+    """
+
+    def __init__(self, maxsize: int = 256, redis_url: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of in-memory entries (0 disables)
+            redis_url: Optional Redis URL for a shared second tier
+        """
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+
+        if redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(redis_url)
+                logger.info("Response cache using Redis")
+            except ImportError:
+                logger.warning("REDIS_URL is set but redis is not installed")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+
+        if self._redis is not None:
+            try:
+                value = self._redis.get(key)
+            except Exception as e:
+                logger.warning(f"Redis cache read failed: {e}")
+                return None
+            if value is not None:
+                value = value.decode("utf-8")
+                self._remember(key, value)
+                return value
+
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response under key."""
+        self._remember(key, value)
+
+        if self._redis is not None:
+            try:
+                self._redis.set(key, value.encode("utf-8"))
+            except Exception as e:
+                logger.warning(f"Redis cache write failed: {e}")
+
+    def clear(self) -> None:
+        """Drop all in-memory entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: str, value: str) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+response_cache = ExactMatchCache(
+    maxsize=settings.RESPONSE_CACHE_SIZE,
+    redis_url=settings.REDIS_URL or None
+)
+
+
+def cached_llm(key_fn: Callable[..., tuple], name: Optional[str] = None) -> Callable:
+    """
+    Cache a service method's LLM response by exact input match.
+
+    ``key_fn`` receives the service instance and the method's arguments
+    (by name, with defaults applied) and returns the tuple of values that
+    determine the response. If ``key_fn`` raises (e.g. the input file is
+    missing), the method runs uncached so its own error handling applies.
+
+    Keys are namespaced by the method's qualified name unless ``name`` is
+    given; pass the same name to a sync method and its async twin so they
+    share entries. The decorated method's ``cache_key(self, *args,
+    **kwargs)`` returns the key a call would use (None if uncacheable), for
+    callers such as streaming variants that read and fill the same entry.
+
+    Args:
+        key_fn: Function mapping (self, **arguments) to key parts
+        name: Cache namespace (defaults to the method's __qualname__)
+
+    Returns:
+        Decorator for service methods (sync or async) returning str
+
+    Example:
+        >>> @cached_llm(lambda self, text: (self.llm_client.model, text))
+        ... def summarize(self, text): ...
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        namespace = name or func.__qualname__
+
+        def build_key(self, args, kwargs) -> Optional[str]:
+            try:
+                bound = signature.bind(self, *args, **kwargs)
+                bound.apply_defaults()
+                arguments = dict(bound.arguments)
+                arguments.pop("self")
+                return make_key(namespace, *key_fn(self, **arguments))
+            except Exception as e:
+                logger.debug("Skipping response cache for %s: %s", namespace, e)
+                return None
+
+        def lookup(key: str) -> Optional[str]:
+            cached = response_cache.get(key)
+            if cached is not None:
+                logger.info("♻️ Cache hit for %s", namespace)
+            return cached
+
+        def store(key: str, result) -> None:
+            if isinstance(result, str):
+                response_cache.set(key, result)
+
+        def cache_key(self, *args, **kwargs) -> Optional[str]:
+            return build_key(self, args, kwargs)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                # Hashing input files and Redis round-trips block, so run
+                # them off the event loop to keep batched calls concurrent
+                key = await asyncio.to_thread(build_key, self, args, kwargs)
+                if key is None:
+                    return await func(self, *args, **kwargs)
+
+                cached = await asyncio.to_thread(lookup, key)
+                if cached is not None:
+                    return cached
+
+                result = await func(self, *args, **kwargs)
+                await asyncio.to_thread(store, key, result)
+                return result
+
+            async_wrapper.cache_key = cache_key
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            key = build_key(self, args, kwargs)
+            if key is None:
+                return func(self, *args, **kwargs)
+
+            cached = lookup(key)
+            if cached is not None:
+                return cached
+
+            result = func(self, *args, **kwargs)
+            store(key, result)
+            return result
+
+        wrapper.cache_key = cache_key
+        return wrapper
+
+    return decorator
@@ -1,23 +1,34 @@
 """Services for AI Content Processor."""
 
-from services.audio_service import AudioService
-from services.image_service import ImageService
-from services.nutrition_service import NutritionService
+import importlib
 
-from services.document_service import (
-    DocumentService,
-)
-
-from services.webpage_qa_service import (
-    WebpageQAService,
-    WebpageQAServiceError,
-)
+# Each service is imported on first access (PEP 562) so that e.g.
+# `from services import AudioService` does not also load ChromaDB and
+# the embedding model used by WebpageQAService.
+_LAZY_IMPORTS = {
+    "AudioService": "services.audio_service",
+    "get_audio_service": "services.audio_service",
+    "ImageService": "services.image_service",
+    "NutritionService": "services.nutrition_service",
+    "DocumentService": "services.document_service",
+    "WebpageQAService": "services.webpage_qa_service",
+    "WebpageQAServiceError": "services.webpage_qa_service",
+}
 
 __all__ = [
     "AudioService",
+    "get_audio_service",
     "ImageService",
     "NutritionService",
     "DocumentService",
     "WebpageQAService",
     "WebpageQAServiceError",
 ]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,17 +5,23 @@ This service provides audio transcription capabilities with proper error
 handling and configuration management.
 """
 
+import functools
+import io
 import os
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Iterator, Optional
 from dataclasses import dataclass
 import logging
 
-os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
+import numpy as np
 
 from config import settings
+from core.log import get_logger
 
-logger = logging.getLogger(__name__)
+log = get_logger(__name__)
+
+# Whisper's input rate; NumPy input must already be mono float32 at this rate
+SAMPLE_RATE = 16000
 
 
 @dataclass
@@ -29,6 +35,52 @@ class TranscriptionResult:
         return self.text
 
 
+@functools.cache
+def _has_cuda() -> bool:
+    """Check for a CUDA device usable by faster-whisper (CTranslate2)."""
+    try:
+        import ctranslate2
+        return ctranslate2.get_cuda_device_count() > 0
+    except Exception:
+        return False
+
+
+@functools.lru_cache(maxsize=4)
+def _load_whisper(model_name: str, device: str, compute_type: str):
+    """
+    Load a Whisper model once per process.
+    
+    Every AudioService with the same configuration shares the returned
+    model, so weights are loaded (and held in memory) only once. The
+    CTranslate2 model behind faster-whisper is safe to call transcribe()
+    on from multiple threads.
+    """
+    log.info("whisper_model_loading", model=model_name)
+    from faster_whisper import WhisperModel
+    
+    # One CTranslate2 worker with half the cores leaves room for the web
+    # server's threads instead of oversubscribing the CPU
+    model = WhisperModel(
+        model_name, 
+        device=device, 
+        compute_type=compute_type,
+        cpu_threads=settings.WHISPER_CPU_THREADS,
+        num_workers=1
+    )
+    log.info("whisper_model_loaded", model=model_name)
+    return model
+
+
+@functools.lru_cache(maxsize=4)
+def _load_batched_whisper(model_name: str, device: str, compute_type: str):
+    """Wrap the shared Whisper model in a batched inference pipeline."""
+    from faster_whisper import BatchedInferencePipeline
+    
+    return BatchedInferencePipeline(
+        model=_load_whisper(model_name, device, compute_type)
+    )
+
+
 class AudioServiceError(Exception):
     """Base exception for audio service errors."""
     pass
@@ -48,7 +100,8 @@ class AudioService:
         self, 
         model_name: Optional[str] = None,
         device: Optional[str] = None,
-        compute_type: str = "int8"
+        compute_type: Optional[str] = None,
+        batch_size: Optional[int] = None
     ):
         """
         Initialize the audio service.
@@ -56,47 +109,187 @@ class AudioService:
         Args:
             model_name: Whisper model to use (tiny.en, base.en, etc.)
             device: Device to run on (cpu, cuda, mps)
-            compute_type: Computation type (int8, float16, float32)
+            compute_type: Computation type (int8, float16, float32; defaults to settings)
+            batch_size: Speech segments decoded per forward pass (1 disables
+                batching; defaults to settings.WHISPER_BATCH_SIZE)
         """
         self.model_name = model_name or settings.WHISPER_MODEL
-        self.device = device or settings.WHISPER_DEVICE
-        self.compute_type = compute_type
-        self._model = None 
+        self.device = device or settings.WHISPER_DEVICE or (
+            "cuda" if _has_cuda() else "cpu"
+        )
+        on_cuda = self.device == "cuda"
+        self.compute_type = compute_type or settings.WHISPER_COMPUTE_TYPE or (
+            "int8_float16" if on_cuda else "int8"
+        )
+        # Batched decoding of VAD segments pays off on GPU; 1 disables it
+        self.batch_size = batch_size or settings.WHISPER_BATCH_SIZE or (
+            8 if on_cuda else 1
+        )
         
-        logger.info(
-            f"Initialized AudioService with model={self.model_name}, "
-            f"device={self.device}"
+        log.info(
+            "audio_service_initialized",
+            model=self.model_name,
+            device=self.device
         )
     
     @property
     def model(self):
-        """Lazy load the Whisper model."""
-        if self._model is None:
-            logger.info(f"Loading Whisper model: {self.model_name}")
-            from faster_whisper import WhisperModel
+        """Lazy load the (process-wide shared) Whisper model."""
+        return _load_whisper(self.model_name, self.device, self.compute_type)
+    
+    def _start_transcription(
+        self,
+        audio_path: str | Path | BinaryIO | np.ndarray,
+        language: Optional[str],
+        beam_size: Optional[int],
+        accurate: bool,
+        vad_filter: bool
+    ) -> tuple:
+        """
+        Validate the input and start decoding.
+        
+        Beam search (5) is only used when requested via ``accurate`` or an
+        explicit ``beam_size``; greedy decoding is ~5x less decoder work.
+        
+        Returns:
+            Tuple of (lazy segments iterator, transcription info)
             
-            self._model = WhisperModel(
-                self.model_name, 
-                device=self.device, 
-                compute_type=self.compute_type
+        Raises:
+            AudioServiceError: If the file is missing or decoding fails to start
+        """
+        if isinstance(audio_path, np.ndarray):
+            # Already decoded samples skip faster-whisper's decode/resample
+            source = audio_path
+            log.info(
+                "transcription_started",
+                source="array",
+                seconds=round(len(source) / SAMPLE_RATE, 2)
             )
-            logger.info("Model loaded successfully")
+        elif hasattr(audio_path, "read"):
+            # faster-whisper decodes file-like objects directly
+            source = audio_path
+            log.info("transcription_started", source="stream")
+        else:
+            source = os.fspath(audio_path)
+            try:
+                os.stat(source)
+            except FileNotFoundError:
+                raise AudioServiceError(f"Audio file not found: {source}") from None
+            
+            log.info("transcription_started", source=os.path.basename(source))
+        
+        beam_size = beam_size or (5 if accurate else 1)
+        vad_parameters = {"min_silence_duration_ms": 500} if vad_filter else None
+        
+        try:
+            if self.batch_size > 1 and vad_filter:
+                # VAD splits the audio into independent speech segments, so
+                # they can be encoded and decoded a batch at a time
+                segments_iter, info = _load_batched_whisper(
+                    self.model_name, self.device, self.compute_type
+                ).transcribe(
+                    source,
+                    beam_size=beam_size,
+                    language=language,
+                    vad_parameters=vad_parameters,
+                    batch_size=self.batch_size
+                )
+            else:
+                segments_iter, info = self.model.transcribe(
+                    source,
+                    beam_size=beam_size,
+                    language=language,
+                    vad_filter=vad_filter,
+                    vad_parameters=vad_parameters,
+                    condition_on_previous_text=False
+                )
+        except Exception as e:
+            log.error("transcription_failed", error=str(e), exc_info=True)
+            raise AudioServiceError(f"Transcription failed: {e}") from e
         
-        return self._model
+        log.info(
+            "language_detected",
+            language=info.language,
+            probability=round(info.language_probability, 4)
+        )
+        
+        return segments_iter, info
+    
+    @staticmethod
+    def _segment_texts(segments_iter) -> Iterator[str]:
+        """Yield stripped segment text as faster-whisper decodes it."""
+        debug = log.is_enabled_for(logging.DEBUG)
+        
+        for segment in segments_iter:
+            if debug:
+                log.debug(
+                    "segment",
+                    start=segment.start,
+                    end=segment.end,
+                    text=segment.text
+                )
+            yield segment.text.strip()
+    
+    def transcribe_stream(
+        self, 
+        audio_path: str | Path | BinaryIO | np.ndarray, 
+        language: Optional[str] = "en",
+        beam_size: Optional[int] = None,
+        accurate: bool = False,
+        vad_filter: bool = True
+    ) -> Iterator[str]:
+        """
+        Transcribe an audio file, yielding each segment's text as it is decoded.
+        
+        Nothing runs until the generator is first advanced, so a missing
+        file is reported on the first iteration.
+        
+        Args:
+            audio_path: Path to the audio file, a binary file-like object
+                (e.g. BytesIO of an upload) to skip the disk round-trip, or
+                mono float32 samples at SAMPLE_RATE
+            language: Language code (en, es, fr, etc.) or None for auto-detect
+            beam_size: Beam size for decoding (1-10); defaults to 5 when
+                accurate is set and 1 (greedy) otherwise
+            accurate: Prefer accuracy (beam search) over speed
+            vad_filter: Skip silent stretches with voice activity detection
+            
+        Yields:
+            Segment text
+            
+        Raises:
+            AudioServiceError: If transcription fails
+        """
+        segments_iter, _ = self._start_transcription(
+            audio_path, language, beam_size, accurate, vad_filter
+        )
+        
+        try:
+            yield from self._segment_texts(segments_iter)
+        except Exception as e:
+            log.error("transcription_failed", error=str(e), exc_info=True)
+            raise AudioServiceError(f"Transcription failed: {e}") from e
     
     def transcribe(
         self, 
-        audio_path: str | Path, 
+        audio_path: str | Path | BinaryIO | np.ndarray, 
         language: Optional[str] = "en",
-        beam_size: int = 5
+        beam_size: Optional[int] = None,
+        accurate: bool = False,
+        vad_filter: bool = True
     ) -> TranscriptionResult:
         """
         Transcribe an audio file to text.
         
         Args:
-            audio_path: Path to the audio file
+            audio_path: Path to the audio file, a binary file-like object
+                (e.g. BytesIO of an upload) to skip the disk round-trip, or
+                mono float32 samples at SAMPLE_RATE
             language: Language code (en, es, fr, etc.) or None for auto-detect
-            beam_size: Beam size for decoding (1-10, higher = more accurate)
+            beam_size: Beam size for decoding (1-10); defaults to 5 when
+                accurate is set and 1 (greedy) otherwise
+            accurate: Prefer accuracy (beam search) over speed
+            vad_filter: Skip silent stretches with voice activity detection
             
         Returns:
             TranscriptionResult with text and metadata
@@ -104,49 +297,54 @@ class AudioService:
         Raises:
             AudioServiceError: If transcription fails
         """
-        audio_path = Path(audio_path)
-        
-        if not audio_path.exists():
-            raise AudioServiceError(f"Audio file not found: {audio_path}")
-        
-        logger.info(f"🎤 Transcribing: {audio_path.name}")
+        segments_iter, info = self._start_transcription(
+            audio_path, language, beam_size, accurate, vad_filter
+        )
         
         try:
-            segments_iter, info = self.model.transcribe(
-                str(audio_path),
-                beam_size=beam_size,
-                language=language
-            )
+            buffer = io.StringIO()
             
-            logger.info(
-                f"📝 Detected language: {info.language} "
-                f"(probability: {info.language_probability:.2%})"
-            )
-            
-            
-            full_text = []
-            
-            for segment in segments_iter:
-                logger.debug(
-                    f"[{segment.start:.2f}s → {segment.end:.2f}s] {segment.text}"
-                )
-                full_text.append(segment.text.strip())
+            for i, text in enumerate(self._segment_texts(segments_iter)):
+                if i:
+                    buffer.write(" ")
+                buffer.write(text)
             
             result = TranscriptionResult(
-                text=" ".join(full_text),
+                text=buffer.getvalue(),
                 language=info.language,
                 language_probability=info.language_probability
             )
             
-            logger.info(f"✅ Transcription complete: {len(result.text)} characters")
+            log.info("transcription_done", chars=len(result.text))
             
             return result
             
         except Exception as e:
-            logger.error(f"❌ Transcription failed: {e}", exc_info=True)
+            log.error("transcription_failed", error=str(e), exc_info=True)
             raise AudioServiceError(f"Transcription failed: {e}") from e
 
 
+def get_audio_service(model_name: Optional[str] = None) -> AudioService:
+    """
+    Get a shared AudioService for a Whisper model.
+    
+    The service (and the Whisper weights it loads) is kept for the life
+    of the process, so repeated requests skip reloading the model.
+    
+    Args:
+        model_name: Whisper model to use (defaults to settings)
+        
+    Returns:
+        Cached AudioService instance
+    """
+    return _get_audio_service(model_name or settings.WHISPER_MODEL)
+
+
+@functools.lru_cache(maxsize=2)
+def _get_audio_service(model_name: str) -> AudioService:
+    return AudioService(model_name=model_name)
+
+
 if __name__ == "__main__":
     import sys
     
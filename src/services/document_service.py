@@ -5,12 +5,16 @@ This service handles meeting minutes generation, financial document processing,
 and other document-related tasks.
 """
 
+import asyncio
 import logging
-from typing import Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 
-from core.llm_client import LLMClient
+from core.llm_client import LLMClient, extract_text
+from core.response_cache import cached_llm, response_cache
 from core.prompt_templates import (
     MeetingPromptTemplate,
     FinancialPromptTemplate
@@ -18,6 +22,30 @@ from core.prompt_templates import (
 
 logger = logging.getLogger(__name__)
 
+# Sentence ends (followed by spaces) and line breaks (speaker turns)
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])[ \t]+|(?<=\n)")
+
+
+def _windows(segments: Iterable[str], window_chars: int) -> Iterator[str]:
+    """Join transcript segments into windows of about window_chars."""
+    window, window_len = [], 0
+    for segment in segments:
+        if not segment:
+            continue
+        window.append(segment)
+        window_len += len(segment) + 1
+        if window_len >= window_chars:
+            yield " ".join(window)
+            window, window_len = [], 0
+    if window:
+        yield " ".join(window)
+
+
+def _merge_messages(partials: list) -> list:
+    """Build the reduce prompt that merges per-window minutes."""
+    merge_prompt = MeetingPromptTemplate.create_meeting_minutes_merge_prompt()
+    return merge_prompt.format_messages(partials="\n\n---\n\n".join(partials))
+
 
 class DocumentServiceError(Exception):
     """Base exception for document service errors."""
@@ -34,6 +62,13 @@ class DocumentService:
         >>> print(minutes)
     """
     
+    # Transcripts longer than this (~12k tokens) are summarized in windows
+    # of MAP_REDUCE_WINDOW_TOKENS concurrently, then merged
+    MAP_REDUCE_CHARS = 48_000
+    MAP_REDUCE_WINDOW_TOKENS = 4000
+    # Window summaries in flight at once, to stay under API rate limits
+    MAX_CONCURRENT_WINDOWS = 4
+    
     def __init__(self, llm_client: Optional[LLMClient] = None):
         """
         Initialize the document service.
@@ -44,10 +79,17 @@ class DocumentService:
         self.llm_client = llm_client or LLMClient(temperature=0.5)
         logger.info("Initialized DocumentService")
     
+    @cached_llm(lambda self, transcript: (
+        self.llm_client.model, self.llm_client.temperature, transcript
+    ))
     def generate_meeting_minutes(self, transcript: str) -> str:
         """
         Generate meeting minutes and task list from a transcript.
         
+        Transcripts over MAP_REDUCE_CHARS are split at sentence and turn
+        boundaries and summarized window by window, in parallel, with
+        generate_meeting_minutes_streaming().
+        
         Args:
             transcript: Meeting transcript text
             
@@ -60,6 +102,13 @@ class DocumentService:
         if not transcript or not transcript.strip():
             raise DocumentServiceError("Transcript cannot be empty")
         
+        if len(transcript) > self.MAP_REDUCE_CHARS:
+            # Windows break only between sentences or speaker turns
+            return self.generate_meeting_minutes_streaming(
+                _SENTENCE_BREAK.split(transcript),
+                window_tokens=self.MAP_REDUCE_WINDOW_TOKENS
+            )
+        
         logger.info("🤖 Generating meeting minutes and tasks...")
         
         try:
@@ -82,6 +131,182 @@ class DocumentService:
             logger.error(f"❌ Meeting minutes generation failed: {e}", exc_info=True)
             raise DocumentServiceError(f"Generation failed: {e}") from e
     
+    def stream_meeting_minutes(self, transcript: str) -> Iterator[str]:
+        """
+        Generate meeting minutes, yielding text as Claude produces it.
+        
+        Shares the response cache with generate_meeting_minutes(): a
+        cached result is yielded whole, and a completed stream is cached.
+        Transcripts over MAP_REDUCE_CHARS are summarized in windows and
+        yielded once merged. Errors are raised on iteration.
+        
+        Args:
+            transcript: Meeting transcript text
+            
+        Yields:
+            Fragments of the formatted meeting minutes
+            
+        Raises:
+            DocumentServiceError: If generation fails
+        """
+        if not transcript or not transcript.strip():
+            raise DocumentServiceError("Transcript cannot be empty")
+        
+        key = DocumentService.generate_meeting_minutes.cache_key(self, transcript)
+        cached = response_cache.get(key) if key else None
+        if cached is not None:
+            logger.info("♻️ Cache hit for streamed meeting minutes")
+            yield cached
+            return
+        
+        if len(transcript) > self.MAP_REDUCE_CHARS:
+            yield self.generate_meeting_minutes(transcript)
+            return
+        
+        logger.info("🤖 Streaming meeting minutes and tasks...")
+        
+        parts = []
+        try:
+            messages = MeetingPromptTemplate.create_meeting_minutes_prompt().format_messages(
+                transcript=transcript
+            )
+            for chunk in self.llm_client.stream(messages):
+                parts.append(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error(f"❌ Meeting minutes generation failed: {e}", exc_info=True)
+            raise DocumentServiceError(f"Generation failed: {e}") from e
+        
+        result = "".join(parts)
+        if key:
+            response_cache.set(key, result)
+        logger.info(f"✅ Generated {len(result)} characters of meeting notes")
+    
+    def generate_meeting_minutes_streaming(
+        self,
+        segments: Iterable[str],
+        window_tokens: int = 2000
+    ) -> str:
+        """
+        Generate meeting minutes while the transcript is still being produced.
+        
+        Segments (e.g. from AudioService.transcribe_stream) are grouped into
+        windows of roughly ``window_tokens`` tokens. Each window is sent to
+        Claude as soon as it is full, so LLM calls overlap with transcription,
+        and the partial minutes are merged with a final reduce prompt. At
+        most MAX_CONCURRENT_WINDOWS requests are in flight at once.
+        
+        Args:
+            segments: Iterable of transcript text segments
+            window_tokens: Approximate window size in tokens
+            
+        Returns:
+            Formatted meeting minutes with tasks
+            
+        Raises:
+            DocumentServiceError: If generation fails
+        """
+        minutes_prompt = MeetingPromptTemplate.create_meeting_minutes_prompt()
+        
+        def summarize_window(text: str) -> str:
+            messages = minutes_prompt.format_messages(transcript=text)
+            return extract_text(self.llm_client.invoke(messages))
+        
+        logger.info("🤖 Generating meeting minutes from streamed transcript...")
+        
+        futures = []
+        # Sync invoke() in a bounded pool: no event loop owns the client's
+        # connections, and the pool size caps concurrent Anthropic requests
+        with ThreadPoolExecutor(
+            max_workers=self.MAX_CONCURRENT_WINDOWS,
+            thread_name_prefix="minutes-window"
+        ) as pool:
+            try:
+                for text in _windows(segments, window_tokens * 4):
+                    futures.append(pool.submit(summarize_window, text))
+                    logger.debug("Queued minutes window %d", len(futures))
+                
+                if not futures:
+                    raise DocumentServiceError("Transcript cannot be empty")
+                
+                partials = [future.result() for future in futures]
+                
+                if len(partials) == 1:
+                    result = partials[0]
+                else:
+                    logger.info(f"🤖 Merging minutes from {len(partials)} windows...")
+                    result = extract_text(self.llm_client.invoke(_merge_messages(partials)))
+                
+            except DocumentServiceError:
+                raise
+            except Exception as e:
+                for future in futures:
+                    future.cancel()
+                logger.error(f"❌ Meeting minutes generation failed: {e}", exc_info=True)
+                raise DocumentServiceError(f"Generation failed: {e}") from e
+        
+        logger.info(f"✅ Generated {len(result)} characters of meeting notes")
+        
+        return result
+    
+    async def agenerate_meeting_minutes_streaming(
+        self,
+        segments: Iterable[str],
+        window_tokens: int = 2000
+    ) -> str:
+        """
+        Async version of generate_meeting_minutes_streaming().
+        
+        Call from a long-lived event loop: the LLM client's async
+        connections belong to the loop that opened them. The segments
+        iterator is advanced in a worker thread so a compute-bound producer
+        (Whisper) does not block the event loop.
+        """
+        minutes_prompt = MeetingPromptTemplate.create_meeting_minutes_prompt()
+        limit = asyncio.Semaphore(self.MAX_CONCURRENT_WINDOWS)
+        
+        async def summarize_window(text: str) -> str:
+            messages = minutes_prompt.format_messages(transcript=text)
+            async with limit:
+                response = await self.llm_client.ainvoke(messages)
+            return extract_text(response)
+        
+        logger.info("🤖 Generating meeting minutes from streamed transcript...")
+        
+        tasks = []
+        try:
+            windows = _windows(segments, window_tokens * 4)
+            
+            while (text := await asyncio.to_thread(next, windows, None)) is not None:
+                tasks.append(asyncio.create_task(summarize_window(text)))
+                logger.debug("Queued minutes window %d", len(tasks))
+            
+            if not tasks:
+                raise DocumentServiceError("Transcript cannot be empty")
+            
+            partials = await asyncio.gather(*tasks)
+            
+            if len(partials) == 1:
+                result = partials[0]
+            else:
+                logger.info(f"🤖 Merging minutes from {len(partials)} windows...")
+                result = extract_text(await self.llm_client.ainvoke(_merge_messages(partials)))
+            
+            logger.info(f"✅ Generated {len(result)} characters of meeting notes")
+            
+            return result
+            
+        except DocumentServiceError:
+            raise
+        except Exception as e:
+            for task in tasks:
+                task.cancel()
+            logger.error(f"❌ Meeting minutes generation failed: {e}", exc_info=True)
+            raise DocumentServiceError(f"Generation failed: {e}") from e
+    
+    @cached_llm(lambda self, transcript: (
+        self.llm_client.model, self.llm_client.temperature, transcript
+    ))
     def format_financial_transcript(self, transcript: str) -> str:
         """
         Format financial terminology in a transcript.
@@ -105,17 +330,12 @@ class DocumentService:
         logger.info("🤖 Formatting financial transcript...")
         
         try:
-            prompt = FinancialPromptTemplate.create_financial_formatting_prompt(
+            messages = FinancialPromptTemplate.create_financial_formatting_messages(
                 transcript
             )
+            response = self.llm_client.invoke(messages)
             
-            formatted_prompt = prompt.format(transcript=transcript)
-            response = self.llm_client.invoke(formatted_prompt)
-            
-            if hasattr(response, 'content'):
-                result = response.content
-            else:
-                result = str(response)
+            result = extract_text(response)
             
             logger.info(f"✅ Formatted {len(result)} characters")
             
@@ -125,6 +345,9 @@ class DocumentService:
             logger.error(f"❌ Financial formatting failed: {e}", exc_info=True)
             raise DocumentServiceError(f"Formatting failed: {e}") from e
     
+    @cached_llm(lambda self, text, max_length: (
+        self.llm_client.model, self.llm_client.temperature, text, max_length
+    ))
     def summarize(self, text: str, max_length: Optional[int] = None) -> str:
         """
         Summarize a long text document.
@@ -154,10 +377,7 @@ class DocumentService:
         try:
             response = self.llm_client.invoke(prompt)
             
-            if hasattr(response, 'content'):
-                result = response.content
-            else:
-                result = str(response)
+            result = extract_text(response)
             
             logger.info(f"✅ Created summary: {len(result)} characters")
             
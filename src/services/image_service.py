@@ -6,17 +6,266 @@ handling and configuration management.
 """
 
 import base64
+import functools
+import mmap
 import os
+import struct
+from dataclasses import dataclass
+from io import BytesIO
 from pathlib import Path
 from typing import Optional
 import logging
-from PIL import Image
+from PIL import Image, ImageOps
 
-from core.llm_client import LLMClient
+from core.llm_client import LLMClient, extract_text
 from core.prompt_templates import ImagePromptTemplate
+from core.response_cache import cached_llm, file_digest
 
 logger = logging.getLogger(__name__)
 
+# PIL format name (lowercased) -> media type accepted by Claude Vision
+_MEDIA_TYPE = {
+    "jpeg": "image/jpeg",
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp"
+}
+
+
+@dataclass(slots=True, frozen=True)
+class ImageInfo:
+    """Basic image metadata, including the media type to send it as."""
+    format: str
+    size: tuple
+    mode: str
+    width: int
+    height: int
+    media_type: str
+
+
+def _make_info(image_format: str, width: int, height: int, mode: str) -> ImageInfo:
+    """Build an ImageInfo, resolving the media type from the format."""
+    return ImageInfo(
+        format=image_format,
+        size=(width, height),
+        mode=mode,
+        width=width,
+        height=height,
+        media_type=_MEDIA_TYPE.get((image_format or "").lower(), "image/png")
+    )
+
+
+# PNG IHDR colour type -> PIL mode (8-bit samples)
+_PNG_MODES = {0: "L", 2: "RGB", 3: "P", 4: "LA", 6: "RGBA"}
+# JPEG SOF component count -> PIL mode
+_JPEG_MODES = {1: "L", 3: "RGB", 4: "CMYK"}
+# JPEG start-of-frame markers (SOF0-SOF15 minus DHT, JPG and DAC)
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _sniff_jpeg(f) -> Optional[ImageInfo]:
+    """Walk JPEG marker segments up to the start-of-frame header."""
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            continue  # standalone markers carry no length
+        if marker in (0xD9, 0xDA):
+            return None  # reached image data without a frame header
+        segment = f.read(2)
+        if len(segment) < 2:
+            return None
+        length = struct.unpack(">H", segment)[0]
+        if marker in _JPEG_SOF_MARKERS:
+            frame = f.read(6)
+            if len(frame) < 6:
+                return None
+            height, width, components = struct.unpack(">xHHB", frame)
+            mode = _JPEG_MODES.get(components)
+            return _make_info("JPEG", width, height, mode) if mode else None
+        f.seek(length - 2, os.SEEK_CUR)
+        # next segment must start with 0xFF
+        if f.read(1) != b"\xff":
+            return None
+
+
+def _sniff_image_info(f) -> Optional[ImageInfo]:
+    """
+    Read format, dimensions and mode from an image's magic bytes.
+    
+    Handles PNG, JPEG, GIF and WebP without building a PIL image; returns
+    None for anything else (or anything unusual) so the caller can fall
+    back to PIL.
+    
+    Args:
+        f: Seekable binary file (or mmap) positioned anywhere
+        
+    Returns:
+        ImageInfo, or None if the header was not recognised
+    """
+    f.seek(0)
+    header = f.read(30)
+    
+    if header.startswith(b"\x89PNG\r\n\x1a\n") and header[12:16] == b"IHDR":
+        width, height, bit_depth, color_type = struct.unpack(">IIBB", header[16:26])
+        mode = _PNG_MODES.get(color_type)
+        if mode is None or (bit_depth != 8 and color_type != 3):
+            return None
+        return _make_info("PNG", width, height, mode)
+    
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        width, height = struct.unpack("<HH", header[6:10])
+        return _make_info("GIF", width, height, "P")
+    
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        chunk = header[12:16]
+        if chunk == b"VP8 " and header[23:26] == b"\x9d\x01\x2a":
+            width, height = struct.unpack("<HH", header[26:30])
+            return _make_info("WEBP", width & 0x3FFF, height & 0x3FFF, "RGB")
+        if chunk == b"VP8L" and header[20] == 0x2F:
+            bits = int.from_bytes(header[21:25], "little")
+            mode = "RGBA" if bits >> 28 & 1 else "RGB"
+            return _make_info("WEBP", (bits & 0x3FFF) + 1, (bits >> 14 & 0x3FFF) + 1, mode)
+        if chunk == b"VP8X":
+            mode = "RGBA" if header[20] & 0x10 else "RGB"
+            width = int.from_bytes(header[24:27], "little") + 1
+            height = int.from_bytes(header[27:30], "little") + 1
+            return _make_info("WEBP", width, height, mode)
+        return None
+    
+    if header[:2] == b"\xff\xd8":
+        return _sniff_jpeg(f)
+    
+    return None
+
+
+def _read_info(f) -> ImageInfo:
+    """Get image info from magic bytes, falling back to PIL's header parser."""
+    info = _sniff_image_info(f)
+    if info is not None:
+        return info
+    
+    f.seek(0)
+    with Image.open(f) as img:
+        return _make_info(img.format, img.width, img.height, img.mode)
+
+
+def _stat_key(image_path: str | Path) -> tuple:
+    """Identify a file version by (path, mtime_ns, size)."""
+    path = os.fspath(image_path)
+    stat = os.stat(path)
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+@functools.lru_cache(maxsize=16)
+def _read_image(path: str, mtime_ns: int, size: int) -> tuple:
+    """
+    Read an image once: header info and base64 in one mmap pass.
+    
+    Only the header is parsed here; pixels are never decoded.
+    
+    Returns:
+        Tuple of (ImageInfo, base64 string)
+    """
+    with open(path, "rb") as image_file, \
+            mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        info = _read_info(data)
+        return info, base64.b64encode(data).decode("ascii")
+
+
+@functools.lru_cache(maxsize=128)
+def _read_header(path: str, mtime_ns: int, size: int) -> ImageInfo:
+    """Read an image's info from its header, without reading the pixels."""
+    with open(path, "rb") as image_file:
+        return _read_info(image_file)
+
+
+def _prepare_upload(file_key: tuple, max_edge: int, max_bytes: int) -> tuple:
+    """
+    Get an image's info and the payload to send for it.
+    
+    Whether to downscale is decided from the header and the file size, so
+    only the payload actually sent is base64-encoded: the original bytes,
+    or the memoized downscale when the image is larger than max_edge or
+    max_bytes.
+    
+    Returns:
+        Tuple of (ImageInfo, base64 string, media type)
+    """
+    info = _read_header(*file_key)
+    size = file_key[2]
+    if max(info.width, info.height) > max_edge or size > max_bytes:
+        encoded_image, media_type = _read_downscaled(*file_key, max_edge)
+        logger.debug("Downscaled image to fit %dpx", max_edge)
+        return info, encoded_image, media_type
+    return info, _read_image(*file_key)[1], info.media_type
+
+
+@functools.lru_cache(maxsize=128)
+def _digest(path: str, mtime_ns: int, size: int) -> str:
+    """Hash an image for response-cache keys, without base64-encoding it."""
+    return file_digest(path)
+
+
+@functools.lru_cache(maxsize=128)
+def _perceptual_hash(path: str, mtime_ns: int, size: int) -> str:
+    """
+    64-bit DCT perceptual hash (pHash) of an image.
+    
+    The lowest 8x8 frequencies of a 32x32 grayscale thumbnail, thresholded
+    at their median, so re-encoded or resized copies hash the same.
+    """
+    import numpy as np
+    from scipy.fft import dctn
+    
+    with Image.open(path) as img:
+        img.draft("L", (64, 64))  # JPEG: decode at reduced scale
+        gray = np.asarray(
+            img.convert("L").resize((32, 32), Image.Resampling.LANCZOS),
+            dtype=np.float32
+        )
+    low = dctn(gray, norm="ortho")[:8, :8]
+    return np.packbits(low > np.median(low)).tobytes().hex()
+
+
+@functools.lru_cache(maxsize=16)
+def _read_downscaled(path: str, mtime_ns: int, size: int, max_edge: int) -> tuple:
+    """
+    Shrink an image to fit max_edge and re-encode it for upload.
+    
+    EXIF orientation is applied first, since the re-encoded file carries
+    no EXIF. Images with alpha or a palette, and PNGs that already fit
+    (re-encoded only for the byte limit), stay lossless PNG; everything
+    else is sent as RGB JPEG.
+    
+    Returns:
+        Tuple of (base64 string, media type)
+    """
+    with Image.open(path) as source:
+        lossless = source.format == "PNG" and max(source.size) <= max_edge
+        # JPEG: decode at the smallest scale that still covers max_edge
+        source.draft(None, (max_edge, max_edge))
+        img = ImageOps.exif_transpose(source)
+    img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+    
+    buffer = BytesIO()
+    if lossless or img.mode == "P" or "A" in img.getbands():
+        img.save(buffer, format="PNG", optimize=True)
+        media_type = "image/png"
+    else:
+        # CMYK, YCbCr and grayscale JPEGs are all sent as RGB JPEG
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img.save(buffer, format="JPEG", quality=85, optimize=True)
+        media_type = "image/jpeg"
+    return base64.b64encode(buffer.getvalue()).decode("ascii"), media_type
+
 
 class ImageServiceError(Exception):
     """Base exception for image service errors."""
@@ -33,7 +282,11 @@ class ImageService:
         >>> print(result)
     """
     
-    SUPPORTED_FORMATS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+    SUPPORTED_FORMATS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.webp'})
+    
+    # Claude downscales anything with a longer edge than this anyway
+    MAX_EDGE = 1568
+    MAX_UPLOAD_BYTES = 1024 * 1024
     
     def __init__(self, llm_client: Optional[LLMClient] = None):
         """
@@ -50,6 +303,10 @@ class ImageService:
         """
         Convert image to base64 for model input.
         
+        Results are memoized per (path, mtime, size), so re-analyzing an
+        unchanged file does not read it again. Use load_for_llm() when the
+        image info is needed too.
+        
         Args:
             image_path: Path to the image file
             
@@ -60,46 +317,161 @@ class ImageService:
             ImageServiceError: If image cannot be read
         """
         try:
-            with open(image_path, "rb") as image_file:
-                encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
-            return encoded_string
+            return _read_image(*_stat_key(image_path))[1]
         except Exception as e:
             raise ImageServiceError(f"Failed to encode image: {e}") from e
     
     @staticmethod
-    def get_image_info(image_path: str | Path) -> dict:
+    def image_digest(image_path: str | Path) -> str:
+        """
+        Get the SHA-256 digest of an image file.
+        
+        The file is hashed in chunks and the digest memoized per file
+        version, so a cached analysis is found without encoding the image.
+        
+        Args:
+            image_path: Path to the image file
+            
+        Returns:
+            Hex SHA-256 digest
+        """
+        return _digest(*_stat_key(image_path))
+    
+    @staticmethod
+    def perceptual_hash(image_path: str | Path) -> str:
+        """
+        Get a perceptual hash that survives re-encoding and resizing.
+        
+        Memoized per file version. Unlike image_digest(), different images
+        with the same coarse structure (e.g. two pages of text) can share
+        a hash.
+        
+        Args:
+            image_path: Path to the image file
+            
+        Returns:
+            16-character hex pHash
+        """
+        return _perceptual_hash(*_stat_key(image_path))
+    
+    @staticmethod
+    def load_for_llm(image_path: str | Path) -> tuple:
+        """
+        Read an image once and return both its info and base64 payload.
+        
+        Args:
+            image_path: Path to the image file
+            
+        Returns:
+            Tuple of (ImageInfo, base64 string)
+            
+        Raises:
+            ImageServiceError: If the image cannot be read
+        """
+        try:
+            info, encoded = _read_image(*_stat_key(image_path))
+        except Exception as e:
+            raise ImageServiceError(f"Failed to load image: {e}") from e
+        return info, encoded
+    
+    @classmethod
+    def prepare_upload(cls, image_path: str | Path, max_edge: int = MAX_EDGE) -> tuple:
+        """
+        Load an image for upload, downscaled if it is too large.
+        
+        Images over max_edge pixels or MAX_UPLOAD_BYTES are shrunk and
+        re-encoded (see downscale_image()); others are sent as-is.
+        
+        Args:
+            image_path: Path to the image file
+            max_edge: Longest edge in pixels to send
+            
+        Returns:
+            Tuple of (ImageInfo of the original, base64 string, media type)
+            
+        Raises:
+            ImageServiceError: If the image cannot be read
+        """
+        try:
+            return _prepare_upload(_stat_key(image_path), max_edge, cls.MAX_UPLOAD_BYTES)
+        except Exception as e:
+            raise ImageServiceError(f"Failed to load image: {e}") from e
+    
+    @staticmethod
+    def downscale_image(image_path: str | Path, max_edge: int = MAX_EDGE) -> tuple:
+        """
+        Resize an image so its longer edge is at most max_edge pixels.
+        
+        RGB images are re-encoded as JPEG (quality 85), everything else
+        as PNG. Results are memoized per file version and max_edge.
+        
+        Args:
+            image_path: Path to the image file
+            max_edge: Maximum width/height in pixels
+            
+        Returns:
+            Tuple of (base64 string, media type)
+            
+        Raises:
+            ImageServiceError: If the image cannot be resized
+        """
+        try:
+            return _read_downscaled(*_stat_key(image_path), max_edge)
+        except Exception as e:
+            raise ImageServiceError(f"Failed to downscale image: {e}") from e
+    
+    @staticmethod
+    def get_image_info(image_path: str | Path) -> ImageInfo:
         """
         Get basic information about an image.
         
+        PNG, JPEG, GIF and WebP headers are read directly from the first
+        bytes of the file; other formats go through PIL.
+        
         Args:
             image_path: Path to the image
             
         Returns:
-            Dictionary with image info (format, size, mode)
+            ImageInfo with format, size, mode, width, height and media_type
         """
         try:
-            with Image.open(image_path) as img:
-                return {
-                    "format": img.format,
-                    "size": img.size,
-                    "mode": img.mode,
-                    "width": img.width,
-                    "height": img.height
-                }
+            return _read_header(*_stat_key(image_path))
         except Exception as e:
             raise ImageServiceError(f"Failed to read image info: {e}") from e
     
+    @cached_llm(lambda self, image_path, prompt, max_edge, downscale, match_similar: (
+        self.llm_client.model,
+        self.llm_client.temperature,
+        prompt,
+        ("phash", self.perceptual_hash(image_path)) if match_similar
+        else self.image_digest(image_path),
+        max_edge if downscale else None
+    ))
     def analyze(
         self,
         image_path: str | Path,
-        prompt: Optional[str] = None
+        prompt: Optional[str] = None,
+        max_edge: int = MAX_EDGE,
+        downscale: bool = True,
+        match_similar: bool = False
     ) -> str:
         """
         Analyze an image and extract information.
         
+        Images larger than max_edge are downscaled before upload, which
+        cuts payload size and vision tokens (Claude would shrink them to
+        that size anyway). Files over 1 MB that already fit are
+        re-encoded: PNGs losslessly, other formats as JPEG.
+        
         Args:
             image_path: Path to the image file
             prompt: Optional text prompt to guide the analysis
+            max_edge: Longest edge in pixels sent to Claude
+            downscale: Set False to send the original file (e.g. OCR on
+                dense text)
+            match_similar: Reuse a cached analysis of a visually identical
+                image (same perceptual hash) even if its bytes differ;
+                leave off for text, where near-identical pages differ
             
         Returns:
             Analysis result from Claude
@@ -107,34 +479,33 @@ class ImageService:
         Raises:
             ImageServiceError: If analysis fails
         """
-        image_path = Path(image_path)
-        
-        if not image_path.exists():
-            raise ImageServiceError(f"Image file not found: {image_path}")
+        try:
+            file_key = _stat_key(image_path)
+        except FileNotFoundError:
+            raise ImageServiceError(f"Image file not found: {image_path}") from None
+        path = file_key[0]
         
-        if image_path.suffix.lower() not in self.SUPPORTED_FORMATS:
+        suffix = os.path.splitext(path)[1].lower()
+        if suffix not in self.SUPPORTED_FORMATS:
             raise ImageServiceError(
-                f"Unsupported image format: {image_path.suffix}. "
-                f"Supported: {', '.join(self.SUPPORTED_FORMATS)}"
+                f"Unsupported image format: {suffix}. "
+                f"Supported: {', '.join(sorted(self.SUPPORTED_FORMATS))}"
             )
         
-        logger.info(f"📸 Analyzing image: {image_path.name}")
+        logger.info("📸 Analyzing image: %s", os.path.basename(path))
         
         try:
-            
-            info = self.get_image_info(image_path)
-            logger.debug(f"Image info: {info['format']} {info['width']}x{info['height']}")
-            
-            encoded_image = self.encode_image(image_path)
+            if downscale:
+                info, encoded_image, media_type = _prepare_upload(
+                    file_key, max_edge, self.MAX_UPLOAD_BYTES
+                )
+            else:
+                info, encoded_image = _read_image(*file_key)
+                media_type = info.media_type
+            logger.debug("Image info: %s %dx%d", info.format, info.width, info.height)
             
             if not prompt:
-                prompt = "Describe what you see in this image. Extract any text present."
-            
-            media_type = f"image/{info['format'].lower()}"
-            if media_type == "image/jpeg":
-                media_type = "image/jpeg"
-            elif media_type not in ["image/png", "image/jpeg", "image/gif", "image/webp"]:
-                media_type = "image/png"  # Default fallback
+                prompt = ImagePromptTemplate.DEFAULT_PROMPT
             
             messages = ImagePromptTemplate.create_image_analysis_messages(
                 encoded_image,
@@ -146,12 +517,9 @@ class ImageService:
             
             response = self.llm_client.invoke(messages)
             
-            if hasattr(response, 'content'):
-                result = response.content
-            else:
-                result = str(response)
+            result = extract_text(response)
             
-            logger.info(f"✅ Analysis complete: {len(result)} characters")
+            logger.info("✅ Analysis complete: %d characters", len(result))
             
             return result
             
@@ -170,7 +538,8 @@ class ImageService:
             Extracted text
         """
         prompt = ImagePromptTemplate.create_text_extraction_prompt()
-        return self.analyze(image_path, prompt=prompt)
+        # Dense text loses legibility when downscaled or JPEG-compressed
+        return self.analyze(image_path, prompt=prompt, downscale=False)
 
 
 
@@ -4,13 +4,41 @@ Nutritionist Service for food item analysis.
 This service provides nutrition analysis capabilities for food items.
 """
 
+import asyncio
+import functools
 import logging
-from pathlib import Path
-from core.llm_client import LLMClient
+import os
+from typing import Optional
+from core.llm_client import LLMClient, extract_text
 from core.prompt_templates import NutritionistPromptTemplate
+from core.response_cache import cached_llm
+from services.image_service import ImageService, ImageServiceError
 
 logger = logging.getLogger(__name__)
 
+
+def _analysis_key(self, image_path, prompt) -> tuple:
+    """Response-cache key parts shared by the sync and async analyses."""
+    return (
+        self.llm_client.model,
+        self.llm_client.temperature,
+        prompt,
+        self.image_service.image_digest(image_path)
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_llm() -> LLMClient:
+    """Default LLM client shared by all NutritionService instances."""
+    return LLMClient()
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_image_service(llm_client: LLMClient) -> ImageService:
+    """Default ImageService, reusing the nutrition service's LLM client."""
+    return ImageService(llm_client=llm_client)
+
+
 class NutritionServiceError(Exception):
     """Custom exception for nutrition service errors."""
     pass
@@ -18,15 +46,48 @@ class NutritionServiceError(Exception):
 class NutritionService:
     """Service for nutrition analysis of food items."""
     
-    def __init__(self, llm_client=None):
-        """Initialize the nutrition service."""
+    def __init__(self, llm_client=None, image_service=None):
+        """
+        Initialize the nutrition service.
+        
+        Args:
+            llm_client: Optional LLM client (defaults to a shared instance)
+            image_service: Optional ImageService (defaults to a shared
+                instance using the same LLM client)
+        """
         self.logger = logger
-        self.llm_client = llm_client or LLMClient()
+        self.llm_client = llm_client or _shared_llm()
+        self.image_service = image_service or _shared_image_service(self.llm_client)
         
         self.logger.info("Nutrition service initialized with LLM client")
-        from .image_service import ImageService
-        self.image_service = ImageService()
 
+    def _build_messages(self, image_path: str, prompt: Optional[str]) -> list:
+        """Validate and load an image and build the nutrition messages for it."""
+        image_path = os.fspath(image_path)
+        try:
+            os.stat(image_path)
+        except FileNotFoundError:
+            raise NutritionServiceError(f"Image file not found: {image_path}") from None
+        # Phone photos are shrunk to Claude's working resolution first,
+        # upright (EXIF orientation applied) and re-encoded as RGB JPEG
+        try:
+            info, encoded_image, media_type = self.image_service.prepare_upload(image_path)
+        except ImageServiceError as e:
+            raise NutritionServiceError(str(e)) from e
+        logger.debug("Image info: %s %dx%d", info.format, info.width, info.height)
+        
+        self.logger.info("Analyzing food items in image: %s", image_path)
+
+        if prompt is None:
+            prompt = "Analyze the food items in this image and provide nutritional information including calories, macronutrients, and dietary value."
+        
+        return NutritionistPromptTemplate.create_nutrition_summary_prompt(
+            prompt,
+            encoded_image,
+            media_type
+        )
+
+    @cached_llm(_analysis_key, name="NutritionService.analyze_food_items")
     def analyze_food_items(self, image_path: str, prompt: str = None) -> dict:
         """
         Analyze food items in an image and provide nutritional information.
@@ -38,47 +99,71 @@ class NutritionService:
         Returns:
             Dictionary containing nutritional analysis results
         """
+        messages = self._build_messages(image_path, prompt)
+        try:
+            response = self.llm_client.invoke(messages)
+            result = extract_text(response)
+            logger.info("✅ Analysis complete: %d characters", len(result))
+            return result
+        
+        except Exception as e:
+            self.logger.error(f"Error analyzing food items: {e}")
+            raise
+
+    @cached_llm(_analysis_key, name="NutritionService.analyze_food_items")
+    async def analyze_food_items_async(self, image_path: str, prompt: str = None) -> str:
+        """
+        Async version of analyze_food_items().
         
+        Args:
+            image_path: Path to the image file
+            prompt: Optional custom prompt for analysis
             
-        image_path = Path(image_path)
-        if not image_path.exists():
-            raise NutritionServiceError(f"Image file not found: {image_path}")
-        info = self.image_service.get_image_info(image_path)
-        logger.debug(f"Image info: {info['format']} {info['width']}x{info['height']}")       
+        Returns:
+            Nutritional analysis text
+        """
+        messages = await asyncio.to_thread(self._build_messages, image_path, prompt)
         try:
-           
-           
-            self.logger.info(f"Analyzing food items in image: {image_path}")
-            encoded_image = self.image_service.encode_image(image_path)
-            media_type = f"image/{info['format'].lower()}";
-            if media_type == "image/jpeg":
-                media_type = "image/jpeg"
-            elif media_type not in ["image/png", "image/jpeg", "image/gif", "image/webp"]:
-                media_type = "image/png"  # Default fallback
-
-            if prompt is None:
-                prompt = "Analyze the food items in this image and provide nutritional information including calories, macronutrients, and dietary value."
-            
-            messages = NutritionistPromptTemplate.create_nutrition_summary_prompt(
-                prompt,
-                encoded_image,
-                media_type
-            )
-            response = self.llm_client.invoke(messages)
-            # Process the response here
-            if hasattr(response, 'content'):
-                result = response.content
-            elif hasattr(response, 'output'):
-                result = response.output
-            else:
-                result = str(response)
-            logger.info(f"✅ Analysis complete: {len(result)} characters")
+            response = await self.llm_client.ainvoke(messages)
+            result = extract_text(response)
+            logger.info("✅ Analysis complete: %d characters", len(result))
             return result
         
         except Exception as e:
             self.logger.error(f"Error analyzing food items: {e}")
             raise
 
+    async def analyze_batch(
+        self,
+        image_paths: list,
+        prompt: str = None,
+        concurrency: int = 8
+    ) -> list:
+        """
+        Analyze several food images concurrently.
+        
+        Requests are network-bound, so up to ``concurrency`` run at once
+        over the LLM client's shared connection pool.
+        
+        Args:
+            image_paths: Paths to the image files
+            prompt: Optional custom prompt used for every image
+            concurrency: Maximum number of in-flight requests
+            
+        Returns:
+            List of analysis results, in the same order as image_paths
+            
+        Example:
+            >>> results = asyncio.run(service.analyze_batch(["a.jpg", "b.jpg"]))
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def guarded(image_path):
+            async with semaphore:
+                return await self.analyze_food_items_async(image_path, prompt)
+        
+        return await asyncio.gather(*(guarded(path) for path in image_paths))
+
 
 if __name__ == "__main__":
     # Example usage
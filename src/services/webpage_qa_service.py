@@ -4,19 +4,108 @@ Webpage Q&A Service with Vector Database.
 Uses existing embedding, text_splitter, and chroma_db modules from the project.
 """
 
+import functools
+import hashlib
 import logging
-import uuid
-from typing import List, Dict, Optional
+import secrets
+import string
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Iterator, List, Dict, Optional, Tuple
 from datetime import datetime
 
-from core.llm_client import LLMClient
-from core.embedding import setup_embedding_model
+import numpy as np
+
+from config import settings
+from core.llm_client import LLMClient, extract_text
+from core.embedding import resolve_backend, setup_embedding_model
 from core.text_splitter import Splitter
 from core.chroma_db import ChromsDBService
 
 logger = logging.getLogger(__name__)
 
 
+# Retrieved chunks for repeated questions are reused for this long
+_QUERY_CACHE_TTL = 300.0
+_QUERY_CACHE_SIZE = 512
+
+
+_BASE62 = string.digits + string.ascii_letters
+
+
+def _new_session_id() -> str:
+    """Random 64-bit session ID in base62 (at most 11 alphanumeric chars)."""
+    n = secrets.randbits(64)
+    digits = []
+    while True:
+        n, r = divmod(n, 62)
+        digits.append(_BASE62[r])
+        if not n:
+            return "".join(reversed(digits))
+
+
+def _collection_name(session_id: str) -> str:
+    """ChromaDB collection holding one session's chunks."""
+    return f"wp_{session_id}"
+
+
+# Chunks whose SimHash fingerprints differ in at most this many of the 64
+# bits are treated as duplicates (repeated nav bars, footers, banners)
+_SIMHASH_MAX_DISTANCE = 3
+
+
+def _simhash(text: str) -> int:
+    """64-bit SimHash of a text over lowercased word 3-gram shingles."""
+    words = text.lower().split()
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))]
+    digests = b"".join(
+        hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        for shingle in shingles
+    )
+    # One row of 64 bits per shingle; each output bit is the majority vote
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1)
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(majority).tobytes(), "big")
+
+
+_ANSWER_PROMPT = """You are a helpful AI assistant answering questions about a webpage.
+
+Webpage Information:
+- Title: {title}
+- URL: {url}
+
+Relevant Content from the webpage:
+{context}
+
+User Question: {question}
+
+Please provide a clear, accurate answer based on the content above. If the content doesn't contain enough information to answer the question, say so honestly. Do not make up information.
+
+Answer:"""
+
+_NO_ANSWER = "I couldn't find relevant information to answer your question."
+
+
+def _normalize_question(question: str) -> str:
+    """Collapse whitespace and case (MiniLM is uncased) for cache keys."""
+    return " ".join(question.lower().split())
+
+
+@dataclass(slots=True)
+class SessionInfo:
+    """A stored webpage session."""
+    title: str
+    url: str
+    chunks: int
+    content_length: int
+    chunk_size: int
+    chunk_overlap: int
+    created_at: str
+    metadata: dict
+
+
 class WebpageQAServiceError(Exception):
     """Base exception for webpage Q&A service errors."""
     pass
@@ -38,7 +127,8 @@ class WebpageQAService:
         llm_client: Optional[LLMClient] = None,
         embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
         chunk_size: int = 1000,
-        chunk_overlap: int = 200
+        chunk_overlap: int = 200,
+        embedding_backend: Optional[str] = None
     ):
         """
         Initialize the webpage Q&A service.
@@ -48,12 +138,22 @@ class WebpageQAService:
             embedding_model_name: HuggingFace model for embeddings
             chunk_size: Default chunk size for text splitting
             chunk_overlap: Default overlap between chunks
+            embedding_backend: auto, torch-bf16, onnx-int8, onnx or torch
+                (defaults to settings.EMBEDDING_BACKEND)
         """
         self.llm_client = llm_client or LLMClient(temperature=0.3)
         
-        # Use existing embedding setup from core.embedding
+        # BF16 PyTorch on BF16-capable CPUs, else ONNX Runtime (int8 on
+        # VNNI/AMX, FP32 elsewhere), are several times faster than FP32
+        # PyTorch; setup_embedding_model falls back to it if they cannot load
+        backend, file_name = resolve_backend(embedding_backend or settings.EMBEDDING_BACKEND)
         logger.info(f"Loading embedding model: {embedding_model_name}")
-        self.embedding_model = setup_embedding_model(embedding_model_name)
+        self.embedding_model = setup_embedding_model(
+            embedding_model_name,
+            backend=backend,
+            file_name=file_name,
+            threads=settings.EMBEDDING_THREADS
+        )
         logger.info(f"✅ Embedding model loaded")
         
         # Store chunking parameters
@@ -61,19 +161,31 @@ class WebpageQAService:
         self.default_chunk_overlap = chunk_overlap
         
         # Use existing ChromaDB service from core.chroma_db
-        chromadb_service = ChromsDBService()
+        self.chromadb_service = ChromsDBService()
         
         # Get the ChromaDB client (it's an attribute, not a method call)
-        self.chroma_client = chromadb_service.chromadb_client
+        self.chroma_client = self.chromadb_service.chromadb_client
+        
+        # Store active sessions
+        self.sessions: Dict[str, SessionInfo] = {}
         
-        # Create or get collection using the service method
-        self.collection = chromadb_service.get_or_create_collection(
-            name="webpage_content",
-            metadata={"description": "Webpage content for Q&A"}
+        # One ChromaDB collection per session, so queries search only that
+        # page's chunks instead of filtering a shared index by metadata
+        self.collections: Dict[str, object] = {}
+        
+        # Per-instance caches for repeated / near-duplicate questions
+        self._embed_question = functools.lru_cache(maxsize=_QUERY_CACHE_SIZE)(
+            self._embed_question_uncached
         )
+        self._query_cache: OrderedDict[Tuple, Tuple[float, List[str]]] = OrderedDict()
+        self._query_cache_lock = threading.Lock()
         
-        # Store active sessions
-        self.sessions: Dict[str, Dict] = {}
+        # Status of background stores: pending -> ready | failed
+        self.store_jobs: Dict[str, Dict] = {}
+        
+        # SimHash fingerprints of each session's stored chunks, so storing
+        # more content under a session skips chunks it already has
+        self.fingerprints: Dict[str, List[int]] = {}
         
         logger.info("Initialized WebpageQAService with existing core modules")
     
@@ -97,6 +209,10 @@ class WebpageQAService:
         chunk_size = chunk_size or self.default_chunk_size
         chunk_overlap = chunk_overlap or self.default_chunk_overlap
         
+        # Short snippets fit in one chunk; the splitter would return it as-is
+        if len(text) <= chunk_size:
+            return [text]
+        
         # Use existing Splitter class
         chunks = Splitter.chunk_transcript(
             text, 
@@ -107,24 +223,116 @@ class WebpageQAService:
         logger.info(f"✂️ Split text into {len(chunks)} chunks (size={chunk_size}, overlap={chunk_overlap})")
         return chunks
     
-    def _create_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def _dedupe_chunks(self, chunks: List[str], fingerprints: List[int]) -> List[str]:
         """
-        Create embeddings using existing HuggingFace model from core.embedding.
+        Drop near-duplicate chunks before they are embedded.
+        
+        Args:
+            chunks: Text chunks in page order
+            fingerprints: SimHashes of chunks already kept; kept chunks'
+                hashes are appended to it
+            
+        Returns:
+            Chunks that are not within _SIMHASH_MAX_DISTANCE bits of an
+            earlier chunk
+        """
+        seen = set(fingerprints)
+        kept = []
+        
+        for chunk in chunks:
+            fingerprint = _simhash(chunk)
+            if fingerprint in seen or any(
+                (fingerprint ^ other).bit_count() <= _SIMHASH_MAX_DISTANCE
+                for other in fingerprints
+            ):
+                continue
+            seen.add(fingerprint)
+            fingerprints.append(fingerprint)
+            kept.append(chunk)
+        
+        if len(kept) < len(chunks):
+            logger.info(f"🧹 Skipped {len(chunks) - len(kept)} duplicate chunks")
+        return kept
+    
+    def _create_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Create embeddings using the sentence-transformers model from core.embedding.
         
         Args:
             texts: List of text chunks
             
         Returns:
-            List of embedding vectors
+            (len(texts), dim) float32 array, passed to ChromaDB as-is
         """
         logger.info(f"🔢 Creating embeddings for {len(texts)} chunks...")
         
-        # Use the HuggingFaceEmbeddings model to embed documents
-        embeddings = self.embedding_model.embed_documents(texts)
+        # NumPy output avoids boxing every component into a Python float
+        embeddings = self.embedding_model.encode(texts)
         
         logger.info(f"✅ Created {len(embeddings)} embeddings")
         return embeddings
     
+    def _embed_question_uncached(self, question_norm: str) -> Tuple[float, ...]:
+        """Embed a normalized question (wrapped in an LRU cache in __init__)."""
+        return tuple(self.embedding_model.embed_query(question_norm))
+    
+    def _retrieve_chunks(self, session_id: str, question: str, n_results: int) -> List[str]:
+        """
+        Find the chunks most relevant to a question, with a short TTL cache.
+        
+        Args:
+            session_id: Session to search
+            question: User's question
+            n_results: Number of chunks to retrieve
+            
+        Returns:
+            Relevant chunk texts (may be empty)
+        """
+        question_norm = _normalize_question(question)
+        key = (session_id, question_norm, n_results)
+        now = time.monotonic()
+        
+        with self._query_cache_lock:
+            cached = self._query_cache.get(key)
+            if cached is not None and cached[0] > now:
+                self._query_cache.move_to_end(key)
+                logger.debug("Query cache hit for session %s", session_id)
+                return cached[1]
+        
+        collection = self.collections[session_id]
+        
+        if n_results >= self.sessions[session_id].chunks:
+            # Every chunk would be returned (e.g. a one-chunk snippet), so
+            # skip embedding the question and the similarity search
+            results = collection.get(include=["documents", "metadatas"])
+            ordered = sorted(
+                zip(results['metadatas'], results['documents']),
+                key=lambda item: item[0]["chunk_index"]
+            )
+            chunks = [document for _, document in ordered]
+        else:
+            question_embedding = self._embed_question(question_norm)
+            
+            results = collection.query(
+                query_embeddings=[list(question_embedding)],
+                n_results=n_results
+            )
+            chunks = results['documents'][0] if results['documents'] else []
+        
+        with self._query_cache_lock:
+            self._query_cache[key] = (now + _QUERY_CACHE_TTL, chunks)
+            self._query_cache.move_to_end(key)
+            while len(self._query_cache) > _QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        
+        return chunks
+    
+    def _clear_query_cache(self, session_id: str) -> None:
+        """Drop cached retrievals for a session whose chunks changed."""
+        with self._query_cache_lock:
+            for key in [k for k in self._query_cache if k[0] == session_id]:
+                del self._query_cache[key]
+    
     def store_webpage_content(
         self,
         title: str,
@@ -132,7 +340,8 @@ class WebpageQAService:
         content: str,
         metadata: Optional[Dict] = None,
         chunk_size: Optional[int] = None,
-        chunk_overlap: Optional[int] = None
+        chunk_overlap: Optional[int] = None,
+        session_id: Optional[str] = None
     ) -> str:
         """
         Store webpage content in vector database.
@@ -145,6 +354,7 @@ class WebpageQAService:
             metadata: Optional additional metadata
             chunk_size: Size of each chunk (uses default if None)
             chunk_overlap: Overlap between chunks (uses default if None)
+            session_id: Session ID to store under (generated if None)
             
         Returns:
             Session ID for querying
@@ -154,7 +364,7 @@ class WebpageQAService:
         """
         try:
             # Generate session ID
-            session_id = str(uuid.uuid4())
+            session_id = session_id or _new_session_id()
             
             logger.info(f"📄 Storing webpage: {title}")
             logger.info(f"📊 Content length: {len(content)} characters")
@@ -175,55 +385,81 @@ class WebpageQAService:
             if not chunks:
                 raise WebpageQAServiceError("No chunks created from content")
             
+            # Skip boilerplate repeated within the page or already stored
+            # under this session; the first chunk of a new session is
+            # always kept
+            fingerprints = list(self.fingerprints.get(session_id, ()))
+            previous = self.sessions.get(session_id)
+            offset = previous.chunks if previous else 0
+            chunks = self._dedupe_chunks(chunks, fingerprints)
+            
+            if not chunks:
+                logger.info(f"♻️ Session {session_id} already has this content")
+                return session_id
+            
             logger.info(f"✂️ Created {len(chunks)} chunks from combined text")
             
             # Create embeddings using existing embedding model
             embeddings = self._create_embeddings(chunks)
             
             # Prepare metadata for each chunk
-            chunk_metadata = []
-            ids = []
-            
-            for i in range(len(chunks)):
-                chunk_meta = {
-                    "session_id": session_id,
+            n = len(chunks)
+            now_iso = datetime.now().isoformat()
+            extra = metadata or {}
+            # Ids only need to be unique within the session's collection
+            ids = [f"{offset + i:x}" for i in range(n)]
+            chunk_metadata = [
+                {
                     "title": title,
                     "url": url,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks),
-                    "stored_at": datetime.now().isoformat()
+                    "chunk_index": offset + i,
+                    # Session total as of this store; appends do not
+                    # rewrite earlier chunks' metadata
+                    "total_chunks": offset + n,
+                    "stored_at": now_iso,
+                    **extra
                 }
-                
-                # Add custom metadata
-                if metadata:
-                    chunk_meta.update(metadata)
-                
-                chunk_metadata.append(chunk_meta)
-                ids.append(f"{session_id}_{i}")
-            
-            # Store in ChromaDB with embeddings from HuggingFace
-            self.collection.add(
+                for i in range(n)
+            ]
+            
+            # Store in ChromaDB with embeddings from the array. Vectors are
+            # kept at full precision: Chroma's HNSW index is float32-only, so
+            # fp16/int8 input would be upcast on insert (no memory saved)
+            # and only lose recall.
+            collection = self.chromadb_service.get_or_create_collection(
+                name=_collection_name(session_id),
+                metadata={"title": title, "url": url}
+            )
+            collection.add(
                 documents=chunks,
                 embeddings=embeddings,
                 metadatas=chunk_metadata,
                 ids=ids
             )
             
+            # Retrievals cached before this store miss the new chunks
+            self._clear_query_cache(session_id)
+            
             # Store session info
-            self.sessions[session_id] = {
-                "title": title,
-                "url": url,
-                "chunks": len(chunks),
-                "content_length": len(combined_text),
-                "chunk_size": chunk_size or self.default_chunk_size,
-                "chunk_overlap": chunk_overlap or self.default_chunk_overlap,
-                "created_at": datetime.now().isoformat(),
-                "metadata": metadata or {}
-            }
+            content_length = len(combined_text)
+            if previous:
+                content_length += previous.content_length
+            self.collections[session_id] = collection
+            self.fingerprints[session_id] = fingerprints
+            self.sessions[session_id] = SessionInfo(
+                title=title,
+                url=url,
+                chunks=offset + n,
+                content_length=content_length,
+                chunk_size=chunk_size or self.default_chunk_size,
+                chunk_overlap=chunk_overlap or self.default_chunk_overlap,
+                created_at=now_iso,
+                metadata=extra
+            )
             
             logger.info(f"✅ Stored session: {session_id}")
             logger.info(f"   - Chunks: {len(chunks)}")
-            logger.info(f"   - Total content: {len(combined_text)} chars")
+            logger.info(f"   - Total content: {content_length} chars")
             
             return session_id
             
@@ -231,6 +467,38 @@ class WebpageQAService:
             logger.error(f"❌ Failed to store content: {e}", exc_info=True)
             raise WebpageQAServiceError(f"Storage failed: {e}") from e
     
+    def _build_prompt(self, session_id: str, question: str, n_results: int) -> Optional[str]:
+        """
+        Retrieve context for a question and build the LLM prompt.
+        
+        Returns:
+            Prompt text, or None if no relevant chunks were found
+        """
+        # Embed the question and query similar chunks (both cached)
+        relevant_chunks = self._retrieve_chunks(session_id, question, n_results)
+        
+        if not relevant_chunks:
+            return None
+        
+        logger.info(f"📚 Found {len(relevant_chunks)} relevant chunks")
+        
+        # Build context from relevant chunks
+        if len(relevant_chunks) == 1:
+            context = relevant_chunks[0]
+        else:
+            context = "\n\n".join(relevant_chunks)
+        
+        # Get session info
+        session_info = self.sessions[session_id]
+        
+        # Create prompt for LLM
+        return _ANSWER_PROMPT.format_map({
+            "title": session_info.title,
+            "url": session_info.url,
+            "context": context,
+            "question": question
+        })
+    
     def ask_question(
         self,
         session_id: str,
@@ -258,53 +526,14 @@ class WebpageQAService:
         try:
             logger.info(f"❓ Question for session {session_id}: {question}")
             
-            # Create embedding for the question using existing model
-            question_embedding = self.embedding_model.embed_query(question)
-            
-            # Query similar chunks using the question embedding
-            results = self.collection.query(
-                query_embeddings=[question_embedding],
-                n_results=n_results,
-                where={"session_id": session_id}
-            )
-            
-            if not results['documents'] or not results['documents'][0]:
-                return "I couldn't find relevant information to answer your question."
-            
-            # Get relevant chunks
-            relevant_chunks = results['documents'][0]
-            
-            logger.info(f"📚 Found {len(relevant_chunks)} relevant chunks")
-            
-            # Build context from relevant chunks
-            context = "\n\n".join(relevant_chunks)
-            
-            # Get session info
-            session_info = self.sessions[session_id]
-            
-            # Create prompt for LLM
-            prompt = f"""You are a helpful AI assistant answering questions about a webpage.
-
-Webpage Information:
-- Title: {session_info['title']}
-- URL: {session_info['url']}
-
-Relevant Content from the webpage:
-{context}
-
-User Question: {question}
-
-Please provide a clear, accurate answer based on the content above. If the content doesn't contain enough information to answer the question, say so honestly. Do not make up information.
-
-Answer:"""
+            prompt = self._build_prompt(session_id, question, n_results)
+            if prompt is None:
+                return _NO_ANSWER
             
             # Get answer from LLM
             response = self.llm_client.invoke(prompt)
             
-            if hasattr(response, 'content'):
-                answer = response.content
-            else:
-                answer = str(response)
+            answer = extract_text(response)
             
             logger.info(f"✅ Generated answer: {len(answer)} characters")
             
@@ -314,7 +543,93 @@ Answer:"""
             logger.error(f"❌ Question answering failed: {e}", exc_info=True)
             raise WebpageQAServiceError(f"Query failed: {e}") from e
     
-    def get_session_info(self, session_id: str) -> Optional[Dict]:
+    def ask_question_stream(
+        self,
+        session_id: str,
+        question: str,
+        n_results: int = 3
+    ) -> Iterator[str]:
+        """
+        Ask a question and stream the answer as it is generated.
+        
+        Retrieval runs before this returns, so a missing session or a
+        failed query is raised immediately; LLM errors are raised while
+        iterating.
+        
+        Args:
+            session_id: Session ID from store_webpage_content
+            question: User's question
+            n_results: Number of relevant chunks to retrieve
+            
+        Returns:
+            Iterator over answer text fragments
+            
+        Raises:
+            WebpageQAServiceError: If the session is unknown or query fails
+        """
+        if session_id not in self.sessions:
+            raise WebpageQAServiceError(f"Session not found: {session_id}")
+        
+        try:
+            logger.info(f"❓ Question (streaming) for session {session_id}: {question}")
+            prompt = self._build_prompt(session_id, question, n_results)
+        except Exception as e:
+            logger.error(f"❌ Question answering failed: {e}", exc_info=True)
+            raise WebpageQAServiceError(f"Query failed: {e}") from e
+        
+        if prompt is None:
+            return iter((_NO_ANSWER,))
+        
+        return self._stream_answer(prompt)
+    
+    def _stream_answer(self, prompt: str) -> Iterator[str]:
+        try:
+            yield from self.llm_client.stream(prompt)
+        except Exception as e:
+            logger.error(f"❌ Question answering failed: {e}", exc_info=True)
+            raise WebpageQAServiceError(f"Query failed: {e}") from e
+    
+    def begin_store(self) -> str:
+        """
+        Reserve a session ID for a store that will run in the background.
+        
+        Returns:
+            Session ID, reported as "pending" until run_store_job() finishes
+        """
+        session_id = _new_session_id()
+        self.store_jobs[session_id] = {"status": "pending"}
+        return session_id
+    
+    def run_store_job(self, session_id: str, **kwargs) -> None:
+        """
+        Run store_webpage_content() for a session reserved by begin_store().
+        
+        Meant to be submitted to an executor; failures are recorded in the
+        job status instead of being raised.
+        
+        Args:
+            session_id: Session ID from begin_store()
+            **kwargs: Arguments for store_webpage_content()
+        """
+        try:
+            self.store_webpage_content(session_id=session_id, **kwargs)
+            self.store_jobs[session_id] = {"status": "ready"}
+        except WebpageQAServiceError as e:
+            self.store_jobs[session_id] = {"status": "failed", "error": str(e)}
+    
+    def get_store_status(self, session_id: str) -> Optional[Dict]:
+        """
+        Get the status of a background store.
+        
+        Args:
+            session_id: Session ID from begin_store()
+            
+        Returns:
+            Dict with "status" (and "error" if failed), or None if unknown
+        """
+        return self.store_jobs.get(session_id)
+    
+    def get_session_info(self, session_id: str) -> Optional[SessionInfo]:
         """
         Get information about a stored session.
         
@@ -341,12 +656,14 @@ Answer:"""
         
         try:
             # Delete from ChromaDB
-            self.collection.delete(
-                where={"session_id": session_id}
-            )
+            self.chroma_client.delete_collection(_collection_name(session_id))
+            self.collections.pop(session_id, None)
             
             # Remove from sessions
             del self.sessions[session_id]
+            self.store_jobs.pop(session_id, None)
+            self.fingerprints.pop(session_id, None)
+            self._clear_query_cache(session_id)
             
             logger.info(f"🗑️ Deleted session: {session_id}")
             return True
@@ -363,7 +680,7 @@ Answer:"""
             List of session information
         """
         return [
-            {"session_id": sid, **info}
+            {"session_id": sid, **asdict(info)}
             for sid, info in self.sessions.items()
         ]
 
@@ -4,23 +4,83 @@ Flask API for Chrome Extension integration.
 Provides REST API endpoints for:
 1. Storing webpage content
 2. Q&A chatbot functionality
+
+The embedding model is loaded with the Q&A service on first use. With
+EMBEDDING_THREADS=1 it is preloaded once in the gunicorn master and
+shared copy-on-write by every worker; otherwise only the workers load it,
+after fork, because the ONNX Runtime thread pool does not survive fork().
 """
 
 import logging
-from flask import Flask, request, jsonify
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from typing import Dict
+from typing import Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
+from config import settings
 from services import WebpageQAService, WebpageQAServiceError
 
 logger = logging.getLogger(__name__)
 
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+    
+    jsonify(), request.get_json() and app.json all go through it, so
+    responses are encoded in native code (NumPy arrays included).
+    """
+    
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if orjson else 0
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs) -> Response:
+        obj = args[0] if len(args) == 1 else (args or kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.option),
+            mimetype=self.mimetype
+        )
+
+
 # Initialize Flask app
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
 CORS(app)  # Enable CORS for Chrome extension
 
-# Initialize service
-qa_service = WebpageQAService()
+# Built on first use, so a gunicorn master that does not preload never
+# loads an embedding model it would only fork away from
+_qa_service: Optional[WebpageQAService] = None
+_qa_service_lock = threading.Lock()
+
+
+def get_qa_service() -> WebpageQAService:
+    """Get this process's WebpageQAService, building it on first call."""
+    global _qa_service
+    if _qa_service is None:
+        with _qa_service_lock:
+            if _qa_service is None:
+                _qa_service = WebpageQAService()
+    return _qa_service
+
+
+# Chunking + embedding runs here so /store can return immediately
+store_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count(),
+    thread_name_prefix="webpage-store"
+)
 
 
 @app.route('/api/health', methods=['GET'])
@@ -54,7 +114,8 @@ def store_webpage():
     }
     
     Returns:
-        JSON with session_id for Q&A
+        202 with session_id; chunking and embedding continue in the
+        background (poll /api/webpage/status/<session_id>)
     """
     try:
         data = request.get_json()
@@ -89,8 +150,11 @@ def store_webpage():
         logger.info(f"📄 Received webpage: {title}")
         logger.info(f"📊 Content length: {len(full_text)} characters")
         
-        # Store in vector database with combined text
-        session_id = qa_service.store_webpage_content(
+        # Store in vector database with combined text, off the request thread
+        session_id = get_qa_service().begin_store()
+        store_executor.submit(
+            get_qa_service().run_store_job,
+            session_id,
             title=title,
             url=url,
             content=combined_text,  # All text combined into one
@@ -99,15 +163,15 @@ def store_webpage():
         
         return jsonify({
             'success': True,
-            'message': 'Content stored successfully',
+            'message': 'Content accepted for storage',
             'data': {
                 'session_id': session_id,
+                'status': 'pending',
                 'title': title,
                 'url': url,
-                'wordCount': metadata.get('wordCount', 0),
-                'storedAt': qa_service.sessions[session_id]['created_at']
+                'wordCount': metadata.get('wordCount', 0)
             }
-        })
+        }), 202
         
     except WebpageQAServiceError as e:
         logger.error(f"❌ Service error: {e}")
@@ -124,6 +188,65 @@ def store_webpage():
         }), 500
 
 
+@app.route('/api/webpage/status/<session_id>', methods=['GET'])
+def store_status(session_id: str):
+    """
+    Get the status of a background store.
+    
+    Args:
+        session_id: Session ID returned by /api/webpage/store
+        
+    Returns:
+        JSON with status: pending, ready or failed
+    """
+    status = get_qa_service().get_store_status(session_id)
+    
+    if status is None:
+        return jsonify({
+            'success': False,
+            'error': 'Session not found'
+        }), 404
+    
+    data = {'session_id': session_id, **status}
+    if status['status'] == 'ready':
+        data['storedAt'] = get_qa_service().sessions[session_id].created_at
+    
+    return jsonify({
+        'success': True,
+        'data': data
+    })
+
+
+def _store_not_ready(session_id: str):
+    """
+    Error response for a session whose background store has not succeeded.
+    
+    Args:
+        session_id: Session ID from the request
+        
+    Returns:
+        (response, status) while pending (409) or after a failure (422,
+        carrying the recorded error), else None
+    """
+    status = get_qa_service().get_store_status(session_id)
+    if not status:
+        return None
+    
+    if status['status'] == 'pending':
+        return jsonify({
+            'success': False,
+            'error': 'Content is still being processed'
+        }), 409
+    
+    if status['status'] == 'failed':
+        return jsonify({
+            'success': False,
+            'error': f"Storing content failed: {status.get('error', 'unknown error')}"
+        }), 422
+    
+    return None
+
+
 @app.route('/api/webpage/ask', methods=['POST'])
 def ask_question():
     """
@@ -131,7 +254,7 @@ def ask_question():
     
     Expected JSON body:
     {
-        "session_id": "uuid-here",
+        "session_id": "4fRxq2ZbT1k",
         "question": "What is this page about?"
     }
     
@@ -162,13 +285,17 @@ def ask_question():
                 'error': 'question is required'
             }), 400
         
+        not_ready = _store_not_ready(session_id)
+        if not_ready:
+            return not_ready
+        
         logger.info(f"❓ Question for session {session_id}: {question}")
         
         # Get answer
-        answer = qa_service.ask_question(session_id, question)
+        answer = get_qa_service().ask_question(session_id, question)
         
         # Get session info
-        session_info = qa_service.get_session_info(session_id)
+        session_info = get_qa_service().get_session_info(session_id)
         
         return jsonify({
             'success': True,
@@ -176,8 +303,8 @@ def ask_question():
                 'answer': answer,
                 'question': question,
                 'session': {
-                    'title': session_info['title'],
-                    'url': session_info['url']
+                    'title': session_info.title,
+                    'url': session_info.url
                 }
             }
         })
@@ -197,6 +324,64 @@ def ask_question():
         }), 500
 
 
+@app.route('/api/webpage/ask_stream', methods=['POST'])
+def ask_question_stream():
+    """
+    Ask a question and stream the answer as Server-Sent Events.
+    
+    Takes the same JSON body as /api/webpage/ask. Each text fragment is
+    sent as ``data: {"token": "..."}``, followed by an ``event: done``
+    (or ``event: error``) message.
+    
+    Returns:
+        text/event-stream response
+    """
+    data = request.get_json(silent=True)
+    
+    if not data:
+        return jsonify({
+            'success': False,
+            'error': 'No data provided'
+        }), 400
+    
+    session_id = data.get('session_id')
+    question = data.get('question')
+    
+    if not session_id or not question:
+        return jsonify({
+            'success': False,
+            'error': 'session_id and question are required'
+        }), 400
+    
+    not_ready = _store_not_ready(session_id)
+    if not_ready:
+        return not_ready
+    
+    try:
+        tokens = get_qa_service().ask_question_stream(session_id, question)
+    except WebpageQAServiceError as e:
+        logger.error(f"❌ Service error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    
+    def generate():
+        try:
+            for token in tokens:
+                yield f"data: {app.json.dumps({'token': token})}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except WebpageQAServiceError as e:
+            logger.error(f"❌ Service error: {e}")
+            yield f"event: error\ndata: {app.json.dumps({'error': str(e)})}\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/api/webpage/sessions', methods=['GET'])
 def list_sessions():
     """
@@ -206,7 +391,7 @@ def list_sessions():
         JSON with list of sessions
     """
     try:
-        sessions = qa_service.list_sessions()
+        sessions = get_qa_service().list_sessions()
         
         return jsonify({
             'success': True,
@@ -236,7 +421,7 @@ def delete_session(session_id: str):
         JSON with success status
     """
     try:
-        deleted = qa_service.delete_session(session_id)
+        deleted = get_qa_service().delete_session(session_id)
         
         if deleted:
             return jsonify({
@@ -257,24 +442,87 @@ def delete_session(session_id: str):
         }), 500
 
 
-def run_api_server(host: str = '0.0.0.0', port: int = 5400, debug: bool = False):
+def _serve_gunicorn(host: str, port: int, workers: int, threads: int) -> None:
+    """Serve the app with gunicorn gthread workers."""
+    from gunicorn.app.base import BaseApplication
+    
+    # A single-threaded model has no intra-op pool to lose across fork(),
+    # so workers can share the master's copy
+    preload = settings.EMBEDDING_THREADS == 1
+    
+    class _Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("threads", threads)
+            self.cfg.set("preload_app", preload)
+            # Long LLM answers and SSE streams outlive the default 30s
+            self.cfg.set("timeout", 120)
+        
+        def load(self):
+            # Runs in the master when preloading, else in each worker after
+            # fork, so the model is loaded exactly where it is used
+            get_qa_service()
+            return app
+    
+    _Server().run()
+
+
+def run_api_server(
+    host: str = '0.0.0.0',
+    port: int = 5400,
+    debug: bool = False,
+    workers: Optional[int] = None,
+    threads: Optional[int] = None
+):
     """
     Run the Flask API server.
     
+    Serves with gunicorn (gthread workers) so a request waiting on the
+    LLM does not block others; debug mode, or a missing gunicorn, uses
+    the Flask development server instead.
+    
     Args:
         host: Server host
         port: Server port
-        debug: Debug mode
+        debug: Debug mode (development server with reloader)
+        workers: gunicorn worker processes (defaults to settings.API_WORKERS;
+            capped at 1 until session state is shared between workers)
+        threads: Threads per worker (defaults to settings.API_THREADS)
     """
+    workers = workers or settings.API_WORKERS
+    threads = threads or settings.API_THREADS
+    
     print("\n" + "=" * 60)
     print("🚀 Webpage Q&A API Server")
     print("=" * 60)
     print(f"\n🌐 Server: http://{host}:{port}")
     print(f"📡 Store endpoint: http://{host}:{port}/api/webpage/store")
+    print(f"⏳ Status endpoint: http://{host}:{port}/api/webpage/status/<session_id>")
     print(f"💬 Q&A endpoint: http://{host}:{port}/api/webpage/ask")
+    print(f"🌊 Streaming Q&A endpoint: http://{host}:{port}/api/webpage/ask_stream")
     print("\nPress Ctrl+C to stop\n")
     
-    app.run(host=host, port=port, debug=debug)
+    if not debug:
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            logger.warning("gunicorn not installed, using the Flask development server")
+        else:
+            if workers > 1:
+                # Sessions, store jobs and the in-memory ChromaDB client are
+                # per process: /store on one worker and /ask on another 404s
+                logger.warning(
+                    "Session state is kept in process memory; running 1 worker "
+                    "instead of %d (raise API_THREADS for concurrency)",
+                    workers
+                )
+                workers = 1
+            _serve_gunicorn(host, port, workers, threads)
+            return
+    
+    app.run(host=host, port=port, debug=debug, threaded=True)
 
 
 if __name__ == "__main__":
@@ -286,7 +534,7 @@ if __name__ == "__main__":
     )
     
     try:
-        run_api_server(debug=True)
+        run_api_server(debug="--debug" in sys.argv)
     except KeyboardInterrupt:
         print("\n\n👋 Shutting down gracefully...")
         sys.exit(0)
@@ -7,49 +7,165 @@ Provides a user-friendly web interface for:
 3. Document processing
 """
 
+import asyncio
+import functools
+import math
 import os
 import sys
 import logging
 
-# Fix OpenMP conflict before any other imports
-os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
+# Cap the OpenMP/BLAS pools before any library starts one: CTranslate2,
+# NumPy's BLAS and torch would otherwise each run a thread per core
+_THREADS = str(max(1, (os.cpu_count() or 2) // 2))
+for _var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS"):
+    os.environ.setdefault(_var, _THREADS)
 
-import gradio as gr
-from config import settings
+# Deliberately after the thread caps above
+import gradio as gr  # noqa: E402
+import numpy as np  # noqa: E402
+from config import settings  # noqa: E402
+from services import (  # noqa: E402
+    DocumentService,
+    ImageService,
+    NutritionService,
+    get_audio_service,
+)
+from services.audio_service import SAMPLE_RATE  # noqa: E402
 
 logger = logging.getLogger(__name__)
 
 
-def transcribe_audio(audio_file_path):
+# One instance of each service per process, so LLM clients (and their
+# connection pools) and the Whisper model are reused across requests.
+# AudioService is already shared via get_audio_service().
+
+@functools.lru_cache(maxsize=1)
+def _get_image_service() -> ImageService:
+    return ImageService()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_nutrition_service() -> NutritionService:
+    return NutritionService()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_document_service() -> DocumentService:
+    return DocumentService()
+
+
+def _warm_up_services() -> None:
     """
-    Transcribe audio file to text.
+    Create every service and run Whisper once before serving.
+    
+    Transcribing a second of silence (with VAD off, so the encoder and
+    decoder actually run) loads the weights and initializes the
+    CTranslate2 kernels and buffers that the first request would
+    otherwise wait for.
+    """
+    logger.info("🔥 Loading services...")
+    get_audio_service().transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), vad_filter=False)
+    _get_image_service()
+    _get_nutrition_service()
+    _get_document_service()
+
+
+def _preprocess_audio(sample_rate: int, samples: np.ndarray) -> np.ndarray:
+    """
+    Convert a Gradio numpy upload to Whisper's input format.
     
     Args:
-        audio_file_path: Path to uploaded audio file
+        sample_rate: Upload sample rate
+        samples: (n,) or (n, channels) array, integer PCM or float
         
     Returns:
-        Transcription result or error message
+        Mono float32 samples in [-1, 1] at 16 kHz
+    """
+    if np.issubdtype(samples.dtype, np.integer):
+        # Signed PCM is centred on 0; unsigned (8-bit WAV) is offset-binary,
+        # centred on half its range. Either way scale by half the range.
+        info = np.iinfo(samples.dtype)
+        half_range = (int(info.max) - int(info.min) + 1) / 2
+        center = info.min + half_range
+        samples = (samples.astype(np.float32) - np.float32(center)) / np.float32(half_range)
+    else:
+        samples = samples.astype(np.float32, copy=False)
+    
+    if samples.ndim == 2:
+        samples = samples.mean(axis=1)
+    
+    if sample_rate != SAMPLE_RATE:
+        from scipy.signal import resample_poly
+        
+        # Polyphase FIR resampling (anti-aliased), e.g. 48 kHz -> 16 kHz
+        # is a single up=1, down=3 filter pass
+        factor = math.gcd(SAMPLE_RATE, sample_rate)
+        samples = resample_poly(
+            samples, SAMPLE_RATE // factor, sample_rate // factor
+        ).astype(np.float32, copy=False)
+    
+    return samples
+
+
+def _has_speech(samples: np.ndarray, threshold: float = 1e-3) -> bool:
+    """
+    Cheap silence gate: whether any 30 ms frame is louder than threshold.
+    
+    Only catches recordings that are silent throughout (about -60 dBFS);
+    pauses inside speech are left to faster-whisper's VAD, which also
+    keeps segment timestamps aligned with the original audio.
     """
-    if audio_file_path is None:
-        return "⚠️ Please upload an audio file."
+    frame = SAMPLE_RATE * 30 // 1000
+    n = len(samples) // frame * frame
+    if n == 0:
+        return bool(samples.size) and float(np.sqrt(np.mean(samples ** 2))) >= threshold
+    frames = samples[:n].reshape(-1, frame)
+    # Compare mean squares against threshold² to skip the sqrt per frame
+    return bool((np.einsum("ij,ij->i", frames, frames) / frame >= threshold ** 2).any())
+
+
+async def transcribe_audio(audio):
+    """
+    Transcribe audio to text, streaming it into the output box.
+    
+    The upload arrives as decoded samples and is handed to Whisper in
+    memory. faster-whisper transcribes one segment at a time, so each
+    finished segment is shown as soon as it is available instead of
+    after the whole recording. Decoding runs in a worker thread so the
+    event loop keeps serving other requests.
     
+    Args:
+        audio: (sample_rate, samples) tuple from the Gradio Audio input
+        
+    Yields:
+        Transcription so far, or an error message
+    """
+    if audio is None:
+        yield "⚠️ Please upload an audio file."
+        return
+    
+    text = ""
     try:
-        # Lazy import to avoid initialization issues
-        from services import AudioService
+        sample_rate, samples = audio
+        logger.info("🎤 Processing audio: %.1fs at %d Hz", len(samples) / sample_rate, sample_rate)
         
-        logger.info(f"🎤 Processing audio: {audio_file_path}")
+        samples = await asyncio.to_thread(_preprocess_audio, sample_rate, samples)
+        if not await asyncio.to_thread(_has_speech, samples):
+            yield "⚠️ No speech detected in the recording."
+            return
         
-        service = AudioService()
-        result = service.transcribe(audio_file_path)
+        segments = get_audio_service().transcribe_stream(samples)
         
-        return result.text
+        while (segment := await asyncio.to_thread(next, segments, None)) is not None:
+            text = f"{text} {segment}" if text else segment
+            yield text
         
     except Exception as e:
-        error_msg = f"❌ Error during transcription: {str(e)}"
-        logger.error(error_msg, exc_info=True)
-        return error_msg
+        logger.exception("❌ Error during transcription")
+        error_msg = f"❌ Error during transcription: {e}"
+        yield f"{text}\n\n{error_msg}" if text else error_msg
 
-def analyze_image(image_file, prompt):
+async def analyze_image(image_file, prompt):
     """
     Analyze image and extract information.
     
@@ -64,23 +180,22 @@ def analyze_image(image_file, prompt):
         return "⚠️ Please upload an image file."
     
     try:
-        # Lazy import
-        from services import ImageService
+        logger.info("📸 Processing image: %s", image_file)
         
-        logger.info(f"📸 Processing image: {image_file}")
-        
-        service = ImageService()
-        result = service.analyze(image_file, prompt=prompt if prompt else None)
+        service = _get_image_service()
+        result = await asyncio.to_thread(
+            service.analyze, image_file, prompt=(prompt or "").strip() or None
+        )
         
         return result
         
     except Exception as e:
-        error_msg = f"❌ Error during image analysis: {str(e)}"
-        logger.error(error_msg, exc_info=True)
+        logger.exception("❌ Error during image analysis")
+        error_msg = f"❌ Error during image analysis: {e}"
         return error_msg
 
 
-def analyze_nutrition(image_file, prompt):
+async def analyze_nutrition(image_file, prompt=None):
     """
     Analyze nutrition from food image.
     
@@ -95,49 +210,52 @@ def analyze_nutrition(image_file, prompt):
         return "⚠️ Please upload an image file."
     
     try:
-        # Lazy import
-        from services import NutritionService
+        logger.info("🥗 Processing nutrition image: %s", image_file)
         
-        logger.info(f"🥗 Processing nutrition image: {image_file}")
-        
-        service = NutritionService()
-        result = service.analyze_food_items(image_file, prompt=prompt if prompt else None)
+        service = _get_nutrition_service()
+        result = await service.analyze_food_items_async(
+            image_file, prompt=(prompt or "").strip() or None
+        )
         
         return result
         
     except Exception as e:
-        error_msg = f"❌ Error during nutrition analysis: {str(e)}"
-        logger.error(error_msg, exc_info=True)
+        logger.exception("❌ Error during nutrition analysis")
+        error_msg = f"❌ Error during nutrition analysis: {e}"
         return error_msg
 
 
-def generate_meeting_minutes(transcript):
+async def generate_meeting_minutes(transcript):
     """
-    Generate meeting minutes from transcript.
+    Generate meeting minutes from transcript, streaming them as written.
     
     Args:
         transcript: Meeting transcript text
         
-    Returns:
-        Meeting minutes or error message
+    Yields:
+        Meeting minutes so far, or an error message
     """
-    if not transcript or not transcript.strip():
-        return "⚠️ Please enter a transcript."
+    # Stripped so a retry of the same pasted transcript hits the
+    # service's response cache even if surrounding whitespace changed
+    transcript = (transcript or "").strip()
+    if not transcript:
+        yield "⚠️ Please enter a transcript."
+        return
     
+    text = ""
     try:
-        from services import DocumentService
-        
         logger.info("📝 Generating meeting minutes...")
         
-        service = DocumentService()
-        result = service.generate_meeting_minutes(transcript)
+        chunks = _get_document_service().stream_meeting_minutes(transcript)
         
-        return result
+        while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+            text += chunk
+            yield text
         
     except Exception as e:
-        error_msg = f"❌ Error generating minutes: {str(e)}"
-        logger.error(error_msg, exc_info=True)
-        return error_msg
+        logger.exception("❌ Error generating minutes")
+        error_msg = f"❌ Error generating minutes: {e}"
+        yield f"{text}\n\n{error_msg}" if text else error_msg
 
 
 def create_interface():
@@ -171,7 +289,7 @@ def create_interface():
                 with gr.Row():
                     with gr.Column():
                         audio_input = gr.Audio(
-                            type="filepath",
+                            type="numpy",
                             label="Upload Audio File"
                         )
                         audio_button = gr.Button(
@@ -187,16 +305,11 @@ def create_interface():
                             placeholder="Transcription will appear here..."
                         )
                 
-                gr.Markdown(
-                    """
-                    💡 **Note:** First transcription may take longer as the model loads
-                    """
-                )
-                
                 audio_button.click(
                     fn=transcribe_audio,
                     inputs=audio_input,
-                    outputs=audio_output
+                    outputs=audio_output,
+                    concurrency_limit=4
                 )
             
             # Tab 2: Image Analysis
@@ -281,7 +394,8 @@ def create_interface():
                 minutes_button.click(
                     fn=generate_meeting_minutes,
                     inputs=transcript_input,
-                    outputs=minutes_output
+                    outputs=minutes_output,
+                    concurrency_limit=16
                 )
              
             # Tab 4: Nutrition Analysis
@@ -312,12 +426,6 @@ def create_interface():
                             placeholder="Analysis will appear here..."
                         )
                 
-                gr.Markdown(
-                    """
-                    💡 **Note:** First analysis may take longer as the model loads
-                    """
-                )
-                
                 nutrition_button.click(
                     fn=analyze_nutrition,
                     inputs=image_input,
@@ -333,6 +441,12 @@ def create_interface():
     return demo
 
 
+@functools.lru_cache(maxsize=1)
+def _get_demo() -> gr.Blocks:
+    """Build the interface once per process; relaunches reuse it."""
+    return create_interface()
+
+
 def launch_app(
     host: str = None,
     port: int = None,
@@ -353,12 +467,21 @@ def launch_app(
     print("🚀 AI Content Processor Web Application")
     print("=" * 60)
     print(f"\n🌐 Server: http://{host}:{port}")
-    print("⚠️  First use may be slower (model loading)")
     print("\nPress Ctrl+C to stop\n")
     
-    demo = create_interface()
+    try:
+        _warm_up_services()
+    except Exception as e:
+        # Handlers report the same error on first use
+        logger.warning("Service warmup failed: %s", e)
+    
+    demo = _get_demo()
+    # Queue bursts instead of rejecting them; up to 8 handlers per event
+    # run at once (Whisper is capped lower, LLM-bound minutes higher)
+    demo.queue(max_size=64, default_concurrency_limit=8)
     
     demo.launch(
+        max_threads=40,
         server_name=host,
         server_port=port,
         share=share,
@@ -381,6 +504,6 @@ if __name__ == "__main__":
         print("\n\n👋 Shutting down gracefully...")
         sys.exit(0)
     except Exception as e:
-        logger.error(f"Fatal error: {e}", exc_info=True)
+        logger.exception("Fatal error")
         print(f"\n❌ Fatal error: {e}")
         sys.exit(1)